@@ -0,0 +1,164 @@
+"""In-process stand-ins for the Discord objects the bot talks to.
+
+FakeGateway owns a set of fake guilds, each with one text channel, and
+routes every send through a simulated HTTP layer. That layer has
+configurable latency and injects 429 responses, which it retries after
+``retry_after`` like discord.py's own HTTP client, logging the same
+"We are being rate limited" warning to the discord.http logger and passing
+every response's status and headers to ``on_response``, as the bot's aiohttp
+trace would see them. Contexts and interactions
+built from it can be passed straight to the bot's command callbacks and
+MainMenuView buttons, and ``install`` points the bot's guild and channel
+lookups at the fake guilds, so scheduled jobs run without a network.
+"""
+import asyncio
+import logging
+import random
+import time
+import types
+
+import discord
+
+http_log = logging.getLogger("discord.http")
+
+class FakeResponse:
+    """The minimal aiohttp-style response discord.HTTPException expects."""
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+class FakeHTTP:
+    """Simulated Discord REST layer: latency, injected 429s and per-request timings."""
+
+    def __init__(self, latency=0.05, jitter=0.02, rate_limit_chance=0.0, retry_after=0.5, max_retries=5, rng=None,
+                 on_response=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_chance = rate_limit_chance
+        self.retry_after = retry_after
+        self.max_retries = max_retries
+        self.rng = rng or random.Random(0)
+        self.on_response = on_response  # Called with (status, headers) for every simulated response
+        self.requests = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.timings = []  # Seconds per completed request, including 429 retries
+
+    async def request(self, route):
+        """Simulate one REST call; raises discord.HTTPException once 429 retries run out."""
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            self.requests += 1
+            await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+            if self.rng.random() >= self.rate_limit_chance:
+                self.respond(200, {})
+                self.timings.append(time.perf_counter() - started)
+                return
+            self.rate_limited += 1
+            self.respond(429, {"Retry-After": str(self.retry_after), "Via": "1.1 google"})
+            if attempt < self.max_retries:
+                http_log.warning(
+                    'We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.',
+                    "POST", route, self.retry_after
+                )
+                await asyncio.sleep(self.retry_after)
+        self.failed += 1
+        raise discord.HTTPException(FakeResponse(429, "Too Many Requests"), f"{route} was rate limited")
+
+    def respond(self, status, headers):
+        if self.on_response:
+            self.on_response(status, headers)
+
+class FakeChannel:
+    def __init__(self, channel_id, guild, http):
+        self.id = channel_id
+        self.guild = guild
+        self.name = f"weather-{guild.id}"
+        self.mention = f"<#{channel_id}>"
+        self._http = http
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        await self._http.request("channel.send")
+        self.sent += 1
+
+class FakeGuild:
+    def __init__(self, guild_id, http):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.channel = FakeChannel(guild_id + 1, self, http)
+
+class FakeMember:
+    def __init__(self, admin=False):
+        self.guild_permissions = types.SimpleNamespace(administrator=admin)
+        self.roles = []
+
+class FakeContext:
+    """Stand-in for commands.Context: the guild, the author and a send that goes through FakeHTTP."""
+
+    def __init__(self, guild, http, admin=False, bot=None, command=None):
+        self.guild = guild
+        self.author = FakeMember(admin)
+        self.channel = guild.channel
+        self.bot = bot
+        self.command = command
+        self.command_failed = False
+        self._http = http
+
+    async def send(self, content=None, **kwargs):
+        await self._http.request("context.send")
+
+class FakeInteractionResponse:
+    def __init__(self, http):
+        self._http = http
+
+    async def send_message(self, content=None, **kwargs):
+        await self._http.request("interaction.response")
+
+class FakeInteraction:
+    """Stand-in for discord.Interaction as MainMenuView's buttons use it."""
+
+    def __init__(self, gateway, guild, admin=False):
+        self.guild = guild
+        self.user = FakeMember(admin)
+        self.client = gateway
+        self.response = FakeInteractionResponse(gateway.http)
+
+class FakeGateway:
+    """A fleet of fake guilds plus the lookups the bot makes against its gateway cache."""
+
+    def __init__(self, guild_ids, http=None):
+        self.http = http or FakeHTTP()
+        self.guilds = {guild_id: FakeGuild(guild_id, self.http) for guild_id in guild_ids}
+        self.channels = {guild.channel.id: guild.channel for guild in self.guilds.values()}
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def install(self, bot):
+        """Point the bot's guild and channel lookups at the fake fleet."""
+        bot.get_guild = self.get_guild
+        bot.get_channel = self.get_channel
+
+    async def invoke(self, bot, name, guild_id, *args, admin=False):
+        """Run a command callback for a guild with the bot's invoke hooks, as a real message would."""
+        command = bot.get_command(name)
+        ctx = self.context(guild_id, admin, bot, command)
+        await command.call_before_hooks(ctx)
+        try:
+            await command(ctx, *args)
+        except Exception:
+            ctx.command_failed = True
+            raise
+        finally:
+            await command.call_after_hooks(ctx)
+
+    def context(self, guild_id, admin=False, bot=None, command=None):
+        return FakeContext(self.guilds[guild_id], self.http, admin, bot, command)
+
+    def interaction(self, guild_id, admin=False):
+        return FakeInteraction(self, self.guilds[guild_id], admin)
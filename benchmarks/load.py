@@ -0,0 +1,224 @@
+"""Load driver: the bot's scheduled jobs and commands against a fake Discord fleet.
+
+Run from the repository root:
+
+    python benchmarks/load.py --guilds 10000 --commands-per-second 50
+
+Seeds a scratch database with --guilds servers, optionally runs the weekly
+generation, then fans the daily post out to every guild while commands and
+menu buttons arrive at --commands-per-second. All Discord traffic goes
+through benchmarks/fake_discord.py with simulated latency and 429s. The
+report gives the fan-out time, p50/p95/p99 latencies and event loop lag,
+and is written as JSON with --output.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from fake_discord import FakeGateway, FakeHTTP
+from run import load_bot
+from metrics import render_metrics  # importable once run.py has put src/ on the path
+
+# Command mix: (report name, weight, "command" or "button", command name or button label)
+COMMAND_MIX = [
+    ("read_weather", 30, "command", "read_weather"),
+    ("view_forecast", 30, "command", "view_forecast"),
+    ("menu.read_weather", 15, "button", "📖 Read Weather"),
+    ("menu.view_forecast", 15, "button", "📅 7-Day Forecast"),
+    ("weather_trends", 5, "command", "weather_trends"),
+    ("climate", 5, "command", "climate"),
+]
+
+def percentiles(samples, scale=1000.0):
+    """Return p50/p95/p99/max of ``samples`` in milliseconds (by default)."""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "count": 0}
+    ordered = sorted(samples)
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale, 3)
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * scale, 3), "count": len(ordered)}
+
+async def monitor_loop_lag(samples, stop, interval=0.01):
+    """Record how late the event loop wakes a sleeper, every ``interval`` seconds."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+async def invoke(main, gateway, kind, target, guild_id):
+    if kind == "button":
+        view = main.MainMenuView(gateway.context(guild_id))
+        item = next(item for item in view.children if item.label == target)
+        await item.callback(gateway.interaction(guild_id))
+        view.stop()
+    else:
+        await gateway.invoke(main.bot, target, guild_id)
+
+async def drive_commands(main, gateway, server_ids, rate, duration, latencies, errors, rng):
+    """Start commands at a fixed rate for ``duration`` seconds and record each one's latency.
+
+    Latency runs from the moment a command was due, not when it actually
+    started, so a stalled event loop shows up in the numbers.
+    """
+    names, weights = [entry[0] for entry in COMMAND_MIX], [entry[1] for entry in COMMAND_MIX]
+    targets = {entry[0]: entry[2:] for entry in COMMAND_MIX}
+    loop = asyncio.get_running_loop()
+
+    async def one(name, due):
+        try:
+            await invoke(main, gateway, *targets[name], rng.choice(server_ids))
+            latencies.setdefault(name, []).append(loop.time() - due)
+        except Exception as e:
+            errors.append(f"{name}: {e!r}")
+
+    tasks = []
+    start = loop.time()
+    total = int(rate * duration)
+    for i in range(total):
+        due = start + i / rate
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(rng.choices(names, weights)[0], due)))
+    await asyncio.gather(*tasks)
+
+async def run_load(main, args):
+    rng = random.Random(args.seed)
+    # Snowflake-shaped ids, so shard_for_guild spreads them like real guilds
+    server_ids = [(i << 22) | rng.getrandbits(22) for i in range(1, args.guilds + 1)]
+    http = FakeHTTP(
+        args.latency, args.jitter, args.rate_limit, args.retry_after, rng=random.Random(args.seed),
+        on_response=main.rate_limit_counter.record
+    )
+    gateway = FakeGateway(server_ids, http)
+    gateway.install(main.bot)
+    main.bot.shard_count = args.shards
+
+    # Every guild has a weather channel and this week's forecasts
+    conn = main.db_manager.get()
+    with conn:
+        conn.executemany(
+            '''INSERT OR REPLACE INTO server_settings (server_id, weather_channel_id) VALUES (?, ?)''',
+            [(server_id, gateway.guilds[server_id].channel.id) for server_id in server_ids]
+        )
+    local_today = datetime.combine(main.guild_now(server_ids[0]).date(), datetime.min.time())
+    await main.generate_fleet(server_ids, local_today)
+    main.scheduler.add_job("weekly_generate", main.auto_generate_weekly_forecast, main.next_weekly_generation, priority=0)
+    main.scheduler.add_job("daily_post", main.post_daily_weather, main.next_daily_post, priority=1)
+
+    lag, stop = [], asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(lag, stop))
+    report = {"phases": {}}
+    now = datetime.now(timezone.utc)
+
+    if args.weekly:
+        started = time.perf_counter()
+        await main.scheduler.dispatch("weekly_generate", [(server_id, now) for server_id in server_ids])
+        report["phases"]["weekly_generate_s"] = round(time.perf_counter() - started, 3)
+
+    # Daily fan-out with command traffic on top
+    latencies, errors = {}, []
+    commands = asyncio.create_task(
+        drive_commands(main, gateway, server_ids, args.commands_per_second, args.duration, latencies, errors, rng)
+    )
+    started = time.perf_counter()
+    await main.scheduler.dispatch("daily_post", [(server_id, now) for server_id in server_ids])
+    fan_out = time.perf_counter() - started
+    await commands
+    stop.set()
+    await lag_task
+
+    send_timings = list(http.timings)
+    statuses = dict(main.db_execute(
+        '''SELECT status, COUNT(*) FROM post_ledger WHERE job=? GROUP BY status''', ("daily_post",), fetchall=True
+    ) or [])
+    delivered = sum(channel.sent for channel in gateway.channels.values())
+    report["phases"]["daily_post_s"] = round(fan_out, 3)
+    report["fan_out"] = {
+        "guilds": args.guilds,
+        "delivered": delivered,
+        "ledger": statuses,
+        "posts_per_second": round(delivered / fan_out, 1) if fan_out else None,
+    }
+    report["http"] = {
+        "requests": http.requests,
+        "rate_limited": http.rate_limited,
+        "failed": http.failed,
+        "latency_ms": percentiles(send_timings),
+    }
+    report["commands"] = {name: percentiles(samples) for name, samples in sorted(latencies.items())}
+    report["commands"]["all"] = percentiles([sample for samples in latencies.values() for sample in samples])
+    report["command_errors"] = errors[:20]
+    report["loop_lag_ms"] = percentiles(lag)
+    report["shards"] = {
+        str(shard_id): main.scheduler.job_stats(shard_id) for shard_id in range(args.shards)
+    }
+    return report
+
+def print_report(report):
+    fan_out = report["fan_out"]
+    print(f"\nDaily post: {fan_out['delivered']}/{fan_out['guilds']} delivered in {report['phases']['daily_post_s']}s "
+          f"({fan_out['posts_per_second']}/s), ledger {fan_out['ledger']}")
+    if "weekly_generate_s" in report["phases"]:
+        print(f"Weekly generation: {report['phases']['weekly_generate_s']}s")
+    http = report["http"]
+    print(f"HTTP: {http['requests']} requests, {http['rate_limited']} rate limited, {http['failed']} failed")
+    print(f"\n{'latency (ms)':24} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    rows = [("http request", http["latency_ms"])] + list(report["commands"].items()) + [("event loop lag", report["loop_lag_ms"])]
+    for name, stats in rows:
+        values = " ".join(f"{stats[key]:>9.1f}" if stats[key] is not None else f"{'-':>9}" for key in ("p50", "p95", "p99", "max"))
+        print(f"{name:24} {stats['count']:>7} {values}")
+    if report["command_errors"]:
+        print(f"\n❌ {len(report['command_errors'])} command errors, e.g. {report['command_errors'][0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=10000, help="simulated guilds (default 10000)")
+    parser.add_argument("--commands-per-second", type=float, default=50, help="command arrival rate (default 50)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of command traffic (default 10)")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean simulated send latency in seconds (default 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="standard deviation of the send latency (default 0.02)")
+    parser.add_argument("--rate-limit", type=float, default=0.01, help="chance a request gets a 429 (default 0.01)")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="seconds a 429 asks the client to wait (default 0.5)")
+    parser.add_argument("--shards", type=int, default=1, help="shard count used to partition the jobs (default 1)")
+    parser.add_argument("--post-concurrency", type=int, help="override POST_CONCURRENCY")
+    parser.add_argument("--weekly", action="store_true", help="run the weekly generation before the daily post")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for guild ids, command mix and latencies")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    parser.add_argument("--metrics-output", help="write the bot's Prometheus metrics to this path afterwards")
+    args = parser.parse_args()
+
+    if args.post_concurrency:
+        os.environ["POST_CONCURRENCY"] = str(args.post_concurrency)
+    with tempfile.TemporaryDirectory(prefix="weather-load-") as tmp:
+        bot_module = load_bot(os.path.join(tmp, "load.db"))
+        # Injected 429s are logged like discord.py's; they are counted by the metrics, not printed
+        logging.getLogger("discord.http").propagate = False
+        try:
+            report = asyncio.run(run_load(bot_module, args))
+        finally:
+            bot_module.db_manager.close_all()
+            if bot_module.generation_pool is not None:
+                bot_module.generation_pool.shutdown()
+    report["meta"] = {key: value for key, value in vars(args).items() if key not in ("output", "metrics_output")}
+    print_report(report)
+    if args.metrics_output:
+        with open(args.metrics_output, "w") as f:
+            f.write(render_metrics())
+        print(f"\nMetrics written to {args.metrics_output}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 1 if report["command_errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Offline benchmarks for the weather generator, database and rendering paths.
+
+Run from the repository root:
+
+    python benchmarks/run.py
+
+Results are written to benchmarks/results.json and compared against
+benchmarks/baseline.json. Every timed round follows a round of a fixed
+reference loop, and the comparison uses the median ratio between the two, so
+it follows how much slower the code got rather than how fast or busy the
+machine was. Any benchmark slower than its baseline by more than --tolerance
+fails the run. Use --save-baseline to record a new baseline after an
+intended change.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results.json")
+
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+sys.path.insert(0, REPO_ROOT)
+import weather_generator
+
+# A fixed Monday, so every run seeds and archives the same week
+BENCHMARK_WEEK = datetime(2026, 1, 5)
+SEASON, REGION, TIME_OF_DAY = "spring", "coastal", "afternoon"
+
+BENCHMARKS = []
+
+def benchmark(name):
+    """Register a benchmark; the function takes the environment and returns (run_round, ops_per_round)."""
+    def register(fn):
+        BENCHMARKS.append((name, fn))
+        return fn
+    return register
+
+def load_bot(db_path):
+    """Import the bot against a scratch database, without connecting to Discord."""
+    for key, value in {
+        "DISCORD_TOKEN": "benchmark", "DATABASE_HOST": "localhost", "DATABASE_PORT": "3306",
+        "DATABASE_USER": "benchmark", "DATABASE_PASSWORD": "benchmark", "DATABASE_NAME": "benchmark",
+    }.items():
+        os.environ.setdefault(key, value)
+    # Pin everything that changes what the benchmarks measure
+    os.environ.update(WEATHER_DB_PATH=db_path, FORECAST_MODE="stored", FORECAST_STYLE="simple")
+    import main
+    logging.getLogger().setLevel(logging.WARNING)
+    main.initialize_database()
+    return main
+
+class Environment:
+    """Shared fixtures: the imported bot, a seeded database and pregenerated components."""
+
+    def __init__(self, guilds, db_path):
+        random.seed(0)
+        self.guilds = guilds
+        self.server_ids = list(range(1, guilds + 1))
+        self.main = load_bot(db_path)
+        self.main.write_forecasts(self.main.generate_weekly_chunk(self.server_ids, BENCHMARK_WEEK))
+        self.components = [weather_generator.get_weather_components(SEASON, REGION, TIME_OF_DAY) for _ in range(5000)]
+        self.week_rows = [row[1:4:2] for row in self.main.build_weekly_forecast_rows(1, BENCHMARK_WEEK, style="standard")]
+
+# Generator
+@benchmark("generator.weighted_choice")
+def bench_weighted_choice(env):
+    def run():
+        for _ in range(10000):
+            weather_generator.weighted_choice(weather_generator.PRECIPITATION_TYPES)
+    return run, 10000
+
+@benchmark("generator.get_weather_components")
+def bench_get_weather_components(env):
+    def run():
+        components = None
+        for _ in range(5000):
+            components = weather_generator.get_weather_components(SEASON, REGION, TIME_OF_DAY, components)
+    return run, 5000
+
+@benchmark("generator.get_weather_components_batch")
+def bench_get_weather_components_batch(env):
+    if weather_generator.np is None:
+        return None
+    n = env.guilds * 7
+    return lambda: weather_generator.get_weather_components_batch(SEASON, REGION, TIME_OF_DAY, n, 0), n
+
+@benchmark("generator.get_weather_forecast")
+def bench_get_weather_forecast(env):
+    dates = [(BENCHMARK_WEEK + timedelta(days=day)).strftime("%Y-%m-%d") for day in range(7)]
+    def run():
+        for server_id in range(200):
+            weather_generator.get_weather_forecast(server_id, dates, SEASON, REGION)
+    return run, 200
+
+# Rendering
+def _description_benchmark(style):
+    def bench(env):
+        def run():
+            for components in env.components:
+                weather_generator.generate_weather_description(components, SEASON, REGION, TIME_OF_DAY, style)
+        return run, len(env.components)
+    return bench
+
+for _style in ("brief", "standard", "immersive"):
+    benchmark(f"render.generate_weather_description.{_style}")(_description_benchmark(_style))
+
+@benchmark("render.render_weather_descriptions.immersive")
+def bench_render_weather_descriptions(env):
+    def run():
+        weather_generator.render_weather_descriptions(env.components, SEASON, REGION, TIME_OF_DAY, "immersive")
+    return run, len(env.components)
+
+@benchmark("render.view_forecast_message")
+def bench_view_forecast_message(env):
+    def run():
+        for _ in range(2000):
+            env.main.format_forecast_week(env.week_rows)
+    return run, 2000
+
+# Database
+@benchmark("db.db_execute_round_trip")
+def bench_db_execute(env):
+    date_str = BENCHMARK_WEEK.strftime("%Y-%m-%d")
+    picks = [random.choice(env.server_ids) for _ in range(2000)]
+    def run():
+        for server_id in picks:
+            env.main.db_execute(
+                '''SELECT forecast_text FROM weather_forecast WHERE server_id=? AND forecast_date=? AND region=?''',
+                (server_id, date_str, "coastal"), fetchone=True
+            )
+    return run, len(picks)
+
+@benchmark("db.weekly_regeneration")
+def bench_weekly_regeneration(env):
+    def run():
+        env.main.write_forecasts(env.main.generate_weekly_chunk(env.server_ids, BENCHMARK_WEEK))
+    return run, env.guilds
+
+@benchmark("db.archive_weekly_forecast")
+def bench_archive_weekly_forecast(env):
+    server_ids = env.server_ids[:200]
+    def run():
+        for server_id in server_ids:
+            env.main.archive_weekly_forecast(server_id, BENCHMARK_WEEK)
+    return run, len(server_ids)
+
+@benchmark("db.archive_fleet")
+def bench_archive_fleet(env):
+    return lambda: env.main.archive_weeks(env.server_ids, BENCHMARK_WEEK), env.guilds
+
+# Plain interpreter work that no change to the bot affects; every benchmark is also timed relative to it
+REFERENCE_OPS = 10000
+
+def reference_loop():
+    total = 0
+    for i in range(REFERENCE_OPS):
+        total += i * i % 7
+    return total
+
+def calibrate(run, min_round_time):
+    """Return how many calls of ``run`` last at least ``min_round_time`` seconds."""
+    start = time.perf_counter()
+    run()
+    return max(1, int(min_round_time / max(time.perf_counter() - start, 1e-9)) + 1)
+
+def time_round(run, ops, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        run()
+    return (time.perf_counter() - start) / (ops * repeats) * 1e6
+
+def measure(run, ops, rounds, min_round_time=0.1):
+    """Time ``rounds`` rounds after a warm-up; returns per-operation timings in microseconds.
+
+    Each round repeats ``run`` until it has lasted at least ``min_round_time``
+    seconds, so short benchmarks are not dominated by timer and scheduler
+    noise. A shorter round of reference_loop runs right before each one;
+    ``relative`` is the median ratio between the two, which load on the
+    machine shifts far less than the raw timings.
+    """
+    repeats = calibrate(run, min_round_time)
+    reference_repeats = calibrate(reference_loop, min_round_time / 4)
+    timings, ratios = [], []
+    for _ in range(rounds):
+        reference = time_round(reference_loop, REFERENCE_OPS, reference_repeats)
+        timings.append(time_round(run, ops, repeats))
+        ratios.append(timings[-1] / reference)
+    return {
+        "per_op_us": round(min(timings), 3),
+        "median_us": round(statistics.median(timings), 3),
+        "relative": round(statistics.median(ratios), 3),
+        "ops": ops * repeats,
+        "rounds": rounds,
+    }
+
+def run_benchmarks(guilds, rounds, name_filter=None):
+    """Run every registered benchmark matching the filter and return {name: timings}."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="weather-bench-") as tmp:
+        env = Environment(guilds, os.path.join(tmp, "bench.db"))
+        try:
+            for name, fn in BENCHMARKS:
+                if name_filter and name_filter not in name:
+                    continue
+                setup = fn(env)
+                if setup is None:
+                    print(f"{name:48} skipped")
+                    continue
+                results[name] = measure(*setup, rounds)
+                print(f"{name:48} {results[name]['median_us']:>12.3f} us/op (median)")
+        finally:
+            env.main.db_manager.close_all()
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, tolerance):
+    """Print each benchmark's reference-relative time against the baseline and return the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark (median us/op)':48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:48} {'-':>12} {result['median_us']:>12.3f}      new")
+            continue
+        if "relative" in base:
+            change = result["relative"] / base["relative"] - 1
+        else:
+            # Baselines recorded before the reference loop only have raw timings
+            change = result["median_us"] / base["median_us"] - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:48} {base['median_us']:>12.3f} {result['median_us']:>12.3f} {change:>+8.0%}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=1000, help="guilds seeded into the scratch database (default 1000)")
+    parser.add_argument("--rounds", type=int, default=9, help="timed rounds per benchmark; the median is compared (default 9)")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown relative to the reference before failing (default 0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.guilds, args.rounds, args.filter)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "guilds": args.guilds,
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("guilds") != args.guilds:
+        print(f"⚠️ Baseline was recorded with {baseline['meta'].get('guilds')} guilds; database timings may not be comparable.")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import random
+from datetime import timedelta
+from functools import lru_cache
+
+# The component generator lives at the repository root, next to src/
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+import weather_generator
+
+# Forecast generation shared by the bot and its generation worker processes.
+# Nothing here touches Discord or the database, so worker processes only import this module.
+
+SEASONS = {
+    "spring": {"temp_range": (50, 70), "weather_types": ["sunny", "rainy", "cloudy", "misty"]},
+    "summer": {"temp_range": (75, 95), "weather_types": ["sunny", "stormy", "humid", "foggy"]},
+    "autumn": {"temp_range": (45, 65), "weather_types": ["cloudy", "windy", "rainy", "misty"]},
+    "winter": {"temp_range": (30, 50), "weather_types": ["snowy", "cold", "windy", "foggy"]}
+}
+LOCATIONS = ("coastal", "forest")
+# "simple" is the bot's own "stormy and 60°F" text; the others render weather_generator components
+FORECAST_STYLES = ("simple", "brief", "standard", "immersive")
+# Components stored in their own columns next to the rendered text
+COMPONENT_FIELDS = ("precipitation", "cloud_cover", "wind", "wind_speed", "humidity", "humidity_value", "special", "magical")
+# Values each indexed component can be searched for
+SEARCHABLE_COMPONENTS = {
+    field: tuple(value for value in values if value != "none")
+    for field, values in (
+        ("precipitation", weather_generator.PRECIPITATION_TYPES),
+        ("special", weather_generator.SPECIAL_CONDITIONS),
+        ("magical", weather_generator.MAGICAL_EFFECTS),
+    )
+}
+PRECIPITATION_CONDITIONS = frozenset({"rainy", "stormy", "snowy"}) | frozenset(
+    precipitation for precipitation in weather_generator.PRECIPITATION_TYPES if precipitation != "none"
+)
+
+@lru_cache(maxsize=None)
+def weather_table(season, location):
+    """Return the (weather_types, temp_range) table for a season and location."""
+    config = SEASONS[season]
+    temp_range = config["temp_range"]
+    weather_types = config["weather_types"].copy()
+
+    modifier = -5 if location == "coastal" else -3
+    temp_range = (temp_range[0] + modifier, temp_range[1] + modifier)
+
+    if location == "coastal":
+        weather_types += ["stormy", "humid"] * 3
+    elif location == "forest":
+        weather_types += ["foggy", "misty"] * 2
+
+    return tuple(weather_types), temp_range
+
+def warm_tables():
+    """Build every weather table up front; used as the generation worker initializer."""
+    # Forked workers inherit the parent's random state, so give each its own
+    random.seed()
+    for season in SEASONS:
+        for location in LOCATIONS:
+            weather_table(season, location)
+    weather_generator.warm_samplers()
+
+def apply_trend(weather_types, trend):
+    """Bias weather types toward a {condition: share} trend; each 10% adds one extra entry."""
+    weighted = list(weather_types)
+    for weather_type, share in trend.items():
+        if weather_type in weather_types:
+            weighted.extend([weather_type] * int(share * 10))  # Increase likelihood
+    return tuple(weighted)
+
+# Generate base weather
+def generate_base_weather(season, location, rng=random, trend=None):
+    weather_types, temp_range = weather_table(season, location)
+    if trend:
+        weather_types = apply_trend(weather_types, trend)
+    return rng.choice(weather_types), rng.randint(temp_range[0], temp_range[1])
+
+# Generate daily forecast
+def generate_daily_forecast(season, location, rng=random, trend=None):
+    weather_type, temperature = generate_base_weather(season, location, rng, trend)
+    return f"{weather_type} and {temperature}°F"
+
+def build_weekly_forecast_rows(server_id, start_date, trend=None, style="simple"):
+    """Generate (server_id, forecast_date, region, forecast_text, components) rows for the 7 days from start_date.
+
+    The simple style has no components (None) and honours ``trend``, an
+    optional {region: {condition: share}} weighting. The other styles carry
+    each day's weather_generator components, chained day to day.
+    """
+    season = "spring"  # You can determine the season based on the current date
+    dates = [(start_date + timedelta(days=day)).strftime("%Y-%m-%d") for day in range(0, 7)]  # <-- Start from 0 to include today
+    if style == "simple":
+        coastal_trend = (trend or {}).get("coastal")
+        return [
+            (server_id, forecast_date, "coastal", generate_daily_forecast(season, "coastal", trend=coastal_trend), None)
+            for forecast_date in dates
+        ]
+    week = []
+    components = None
+    for _ in dates:
+        components = weather_generator.get_weather_components(season, "coastal", "afternoon", components)
+        week.append(components)
+    # Render the whole week in one pass over the compiled templates
+    texts = weather_generator.render_weather_descriptions(week, season, "coastal", "afternoon", style)
+    return [
+        (server_id, forecast_date, "coastal", forecast_text, components)
+        for forecast_date, forecast_text, components in zip(dates, texts, week)
+    ]
+
+def generate_weekly_chunk(server_ids, start_date, style="simple"):
+    """Generate the weekly rows for a chunk of servers; runs inside a generation worker."""
+    rows = []
+    for server_id in server_ids:
+        rows.extend(build_weekly_forecast_rows(server_id, start_date, style=style))
+    return rows
+
+FORECAST_PATTERN = re.compile(r"^(?P<condition>.+?) and (?P<temperature>-?\d+)°F$")
+
+def parse_forecast(forecast_text):
+    """Split generated forecast text into (condition, temperature); (None, None) for free text."""
+    match = FORECAST_PATTERN.match(forecast_text or "")
+    if not match:
+        return None, None
+    return match.group("condition"), int(match.group("temperature"))
+
+def forecast_fields(forecast_text, components=None):
+    """Return the stored (condition, temperature, *COMPONENT_FIELDS) values for a forecast.
+
+    Without components the condition and temperature are parsed from the
+    text. "none" components are stored as NULL so the partial indexes only
+    hold days where something happens.
+    """
+    if not components:
+        return parse_forecast(forecast_text) + (None,) * len(COMPONENT_FIELDS)
+    condition = components["precipitation"] if components["precipitation"] != "none" else components["cloud_cover"]
+    return (condition, components["temperature"]) + tuple(
+        None if components[field] == "none" else components[field] for field in COMPONENT_FIELDS
+    )
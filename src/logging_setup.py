@@ -0,0 +1,136 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+# Logging for the bot. Code logs through one logger per category ("weather.db",
+# "weather.posts", ...) with %-style arguments, so a disabled level costs one check
+# and an enabled one is formatted on the listener thread, which also does all the I/O.
+
+CATEGORIES = ("bot", "db", "commands", "jobs", "posts", "generation", "metrics")
+# Categories that log per query, per command or per guild; these are rate-sampled
+SAMPLED_CATEGORIES = ("db", "commands", "jobs", "posts")
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def get_logger(category):
+    """Return the logger for one of CATEGORIES."""
+    return logging.getLogger(f"weather.{category}")
+
+def record_fields(record):
+    """Return the structured fields passed to a log call through ``extra``."""
+    return {key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES}
+
+class TextFormatter(logging.Formatter):
+    """The bot's line format with the logger name, followed by the record's fields as key=value pairs."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        return line + "".join(f" {key}={value}" for key, value in record_fields(record).items())
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the record's fields."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as they are; the queue never leaves the process, so formatting can wait for the listener.
+
+    Arguments are formatted later on the listener thread, so don't mutate an
+    object after passing it to a log call.
+    """
+
+    def prepare(self, record):
+        return record
+
+class SamplingFilter(logging.Filter):
+    """Let through at most ``rate`` records per second for each logger and message template.
+
+    Records at ``max_level`` (INFO) and below are sampled with a token bucket
+    per template; warnings and errors always pass. The next record let through
+    carries the number dropped before it in its ``suppressed`` field.
+    """
+
+    def __init__(self, rate, burst=None, max_level=logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.max_level = max_level
+        self._buckets = {}  # (logger, template) -> [tokens, last refill, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.msg)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+def parse_levels(spec):
+    """Parse "db=DEBUG,discord=WARNING" into {logger name: level}; bare category names get the weather. prefix."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        name = name.strip()
+        levels[f"weather.{name}" if name in CATEGORIES else name] = level.strip().upper()
+    return levels
+
+def setup_logging(level="INFO", levels="", fmt="text", sample_rate=0, stream=None):
+    """Send every log record through a queue to a listener thread that formats and writes it.
+
+    ``levels`` holds per-category overrides (see parse_levels) and
+    ``sample_rate`` is the records per second let through for each message in
+    SAMPLED_CATEGORIES (0 disables sampling). Replaces any root handlers and
+    returns the started QueueListener, which is flushed and stopped at exit.
+    """
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(LocalQueueHandler(log_queue))
+    root.setLevel(level.upper())
+    for name, category_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(category_level)
+    if sample_rate > 0:
+        sampler = SamplingFilter(sample_rate)
+        for category in SAMPLED_CATEGORIES:
+            get_logger(category).addFilter(sampler)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
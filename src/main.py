@@ -1,15 +1,38 @@
 import discord 
-from discord.ext import commands, tasks
+from discord.ext import commands
 import discord.ui 
 from discord.ui import View, Button, button
 import sqlite3
 import mysql.connector
 import random
 import os
+import atexit
+import threading
+import asyncio
+import functools
+import time as time_module
+import heapq
+import itertools
+import uuid
+import json
+import zlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict, Counter
 from dotenv import load_dotenv 
 import logging
 from datetime import datetime, timedelta, time, timezone
-import pytz 
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from forecast_generation import (
+    generate_daily_forecast, build_weekly_forecast_rows, generate_weekly_chunk, warm_tables, parse_forecast,
+    forecast_fields, PRECIPITATION_CONDITIONS, FORECAST_STYLES, COMPONENT_FIELDS, SEARCHABLE_COMPONENTS
+)
+from logging_setup import setup_logging, get_logger
+from metrics import (
+    Counter as MetricCounter, Gauge, Histogram, RateLimitCounter, statement_label, start_metrics_server,
+    STARTED as METRICS_STARTED
+)
 
 # Load environment variables
 load_dotenv()
@@ -23,10 +46,71 @@ MYSQL_PASSWORD = os.getenv('DATABASE_PASSWORD')
 MYSQL_DATABASE = os.getenv('DATABASE_NAME')
 if not all([MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DATABASE]):
     raise ValueError("❌ Database credentials not found. Please set them in your .env file.")
+DB_PATH = os.getenv('WEATHER_DB_PATH', 'weather_bot.db')
+# "stored" keeps one weather_forecast row per day; "seeded" derives each day from a per-guild seed
+FORECAST_MODE = os.getenv('FORECAST_MODE', 'stored').lower()
+if FORECAST_MODE not in ("stored", "seeded"):
+    raise ValueError("❌ FORECAST_MODE must be either 'stored' or 'seeded'.")
+FORECAST_STYLE = os.getenv('FORECAST_STYLE', 'simple').lower()
+if FORECAST_STYLE not in FORECAST_STYLES:
+    raise ValueError(f"❌ FORECAST_STYLE must be one of {', '.join(FORECAST_STYLES)}.")
+FORECAST_CACHE_SIZE = int(os.getenv('FORECAST_CACHE_SIZE', '20000'))
+FORECAST_CACHE_TTL = float(os.getenv('FORECAST_CACHE_TTL', '600'))
+POST_CONCURRENCY = int(os.getenv('POST_CONCURRENCY', '50'))
+POST_CLAIM_TIMEOUT = float(os.getenv('POST_CLAIM_TIMEOUT', '300'))  # Seconds before an unfinished claim can be retaken
+POST_CATCHUP_HOURS = float(os.getenv('POST_CATCHUP_HOURS', '12'))  # How far back startup makes up missed daily posts
+# Sharding: leave unset to let Discord pick the shard count; set both to split shards across processes
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS').split(',')] if os.getenv('SHARD_IDS') else None
+GENERATION_WORKERS = int(os.getenv('GENERATION_WORKERS', str(os.cpu_count() or 1)))  # 0 generates on the database thread
+GENERATION_CHUNK_SIZE = int(os.getenv('GENERATION_CHUNK_SIZE', '500'))  # Guilds per worker task
+# Retention: per-day rows stay hot for RETENTION_HOT_WEEKS, compressed weeks for RETENTION_ROLLUP_MONTHS
+RETENTION_HOT_WEEKS = int(os.getenv('RETENTION_HOT_WEEKS', '8'))
+RETENTION_ROLLUP_MONTHS = int(os.getenv('RETENTION_ROLLUP_MONTHS', '12'))
+RETENTION_DEPARTED_DAYS = float(os.getenv('RETENTION_DEPARTED_DAYS', '7'))  # Grace before a departed guild's data is purged
+RETENTION_INTERVAL_HOURS = float(os.getenv('RETENTION_INTERVAL_HOURS', '24'))
+RETENTION_VACUUM_PAGES = int(os.getenv('RETENTION_VACUUM_PAGES', '1000'))  # Pages freed per incremental vacuum step
+# Metrics are always collected; set METRICS_PORT to serve them for Prometheus
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+# Logging: LOG_LEVELS overrides per category, e.g. "db=DEBUG,posts=WARNING,discord=WARNING"
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+if LOG_FORMAT not in ("text", "json"):
+    raise ValueError("❌ LOG_FORMAT must be either 'text' or 'json'.")
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '5'))  # Lines per second per message on per-guild paths; 0 keeps all
+DEFAULT_TIMEZONE = "America/Chicago"  # US Central, the bot's original posting zone
+DEFAULT_POST_TIME = time(0, 0)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+setup_logging(LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_SAMPLE_RATE)
+bot_log = get_logger("bot")
+db_log = get_logger("db")
+commands_log = get_logger("commands")
+jobs_log = get_logger("jobs")
+posts_log = get_logger("posts")
+generation_log = get_logger("generation")
+
+# Metrics
+HANDLER_SECONDS = Histogram("weather_handler_seconds", "Command and button handler latency.", ("kind", "name", "status"))
+DB_QUERY_SECONDS = Histogram("weather_db_query_seconds", "db_execute latency by statement.", ("statement",))
+DB_QUERY_ERRORS = MetricCounter("weather_db_query_errors_total", "db_execute statements that raised a database error.", ("statement",))
+DB_TASK_SECONDS = Histogram("weather_db_task_seconds", "Time database-thread tasks spend running.", ("task",))
+DB_QUEUE_SECONDS = Histogram("weather_db_queue_wait_seconds", "Time database-thread tasks wait before they start.")
+JOB_SECONDS = Histogram("weather_job_seconds", "Scheduled job batch duration per shard.", ("job", "shard"))
+JOB_LATENESS_SECONDS = Histogram("weather_job_lateness_seconds", "How late the scheduler started due job runs.", ("job",))
+JOB_SKIPPED = MetricCounter("weather_job_skipped_total", "Job runs skipped for being too far overdue.", ("job",))
+FORECASTS_WRITTEN = MetricCounter("weather_forecasts_written_total", "Forecast rows written to the database.")
+GENERATION_RATE = Gauge("weather_generation_guilds_per_second", "Throughput of the last fleet generation.")
+DISCORD_SEND_SECONDS = Histogram("weather_discord_send_seconds", "Discord message send latency.", ("kind",))
+DISCORD_SEND_ERRORS = MetricCounter("weather_discord_send_errors_total", "Discord sends that failed, by HTTP status.", ("kind", "status"))
+DISCORD_RATE_LIMITS = MetricCounter("weather_discord_rate_limits_total", "429 responses, by whether discord.py retried them.", ("outcome",))
+DISCORD_GLOBAL_RATE_LIMITS = MetricCounter(
+    "weather_discord_global_rate_limits_total", "429 responses that hit the global limit (also in weather_discord_rate_limits_total)."
+)
+# Counted from the HTTP responses, so it works whatever level discord.http logs at
+rate_limit_counter = RateLimitCounter(DISCORD_RATE_LIMITS, DISCORD_GLOBAL_RATE_LIMITS)
 
 # Initialize bot intents
 intents = discord.Intents.default()
@@ -47,14 +131,16 @@ class CustomHelpCommand(commands.HelpCommand):
         )
 
         categories = {
-            "📌 Channel Management": ["set_weather_channel", "show_weather_channel"],
+            "📌 Channel Management": [
+                "set_weather_channel", "show_weather_channel", "set_weather_schedule", "show_weather_schedule"
+            ],
             "🗕️ Forecast Control": [
                 "generate_forecast", "view_forecast", "post_weather",
-                "archive_week", "historic_forecast"  # <-- Added archive commands here
+                "archive_week", "historic_forecast", "set_forecast", "weather_trends", "climate", "weather_search"  # <-- Added archive commands here
             ],
             "👥 Role Settings": ["set_weather_reader_role", "view_weather_reader_role"],
             "👁️ Preview": ["read_weather"],
-            "⚙️ Utility": ["ping", "menu", "cleanup_database", "weather_help"]
+            "⚙️ Utility": ["ping", "menu", "cleanup_database", "cache_stats", "shard_stats", "stats", "weather_help"]
         }
 
         for category, command_names in categories.items():
@@ -75,82 +161,443 @@ class CustomHelpCommand(commands.HelpCommand):
         await self.get_destination().send(embed=embed)
 
 # Initialize bot with custom help - do this only once
-bot = commands.Bot(
+bot = commands.AutoShardedBot(
     command_prefix="!",
     intents=intents,
-    help_command=None  # We'll register our help command manually
+    shard_count=SHARD_COUNT,
+    shard_ids=SHARD_IDS,  # This process's shards; the scheduler only ever sees their guilds
+    help_command=None,  # We'll register our help command manually
+    http_trace=rate_limit_counter.trace_config()
 )
+rate_limit_counter.max_timeout = bot.http.max_ratelimit_timeout
+
+def shard_for_guild(guild_id):
+    """Return the shard Discord routes a guild to."""
+    return (guild_id >> 22) % (bot.shard_count or 1)
+
+# Every command is timed for the metrics endpoint and !stats
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.metrics_started = time_module.perf_counter()
+
+@bot.after_invoke
+async def record_command_time(ctx):
+    started = getattr(ctx, "metrics_started", None)
+    if started is not None:
+        status = "error" if ctx.command_failed else "ok"
+        HANDLER_SECONDS.observe(time_module.perf_counter() - started, "command", ctx.command.qualified_name, status)
 
 # Constants
 GOLARION_DAYS = ["Moonday", "Toilday", "Wealday", "Oathday", "Fireday", "Starday", "Sunday"]
-SEASONS = {
-    "spring": {"temp_range": (50, 70), "weather_types": ["sunny", "rainy", "cloudy", "misty"]},
-    "summer": {"temp_range": (75, 95), "weather_types": ["sunny", "stormy", "humid", "foggy"]},
-    "autumn": {"temp_range": (45, 65), "weather_types": ["cloudy", "windy", "rainy", "misty"]},
-    "winter": {"temp_range": (30, 50), "weather_types": ["snowy", "cold", "windy", "foggy"]}
-}
+
+# Long-lived SQLite connections
+class ConnectionManager:
+    """Hand out one persistent, tuned SQLite connection per thread.
+
+    Connections are opened lazily in WAL mode and kept for the life of the
+    process, so queries reuse the connection's prepared statement cache
+    instead of paying connect and journal setup on every call.
+    """
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",  # Safe with WAL, skips an fsync per commit
+        "PRAGMA cache_size=-16000",  # 16 MB page cache
+        "PRAGMA mmap_size=67108864",  # 64 MB memory-mapped reads
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
+    def __init__(self, path, cached_statements=256):
+        self.path = path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=self.cached_statements, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+db_manager = ConnectionManager(DB_PATH)
+atexit.register(db_manager.close_all)
+
+# In-memory forecast cache
+class ForecastCache:
+    """Size-bounded LRU of (server_id, region, forecast_date) -> forecast text with a TTL.
+
+    Dates without a forecast are cached as None so repeated lookups for
+    missing days do not go back to SQLite either.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, server_id, region, dates):
+        """Return ({date: text_or_None} for fresh entries, [dates that missed])."""
+        found, missing = {}, []
+        now = time_module.monotonic()
+        with self._lock:
+            for date_str in dates:
+                key = (server_id, region, date_str)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[date_str] = entry[1]
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(date_str)
+                    self.misses += 1
+        return found, missing
+
+    def put_many(self, server_id, region, forecasts):
+        """Store {date: text_or_None} for a server and region."""
+        expires = time_module.monotonic() + self.ttl
+        with self._lock:
+            for date_str, forecast_text in forecasts.items():
+                key = (server_id, region, date_str)
+                self._entries[key] = (expires, forecast_text)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh(self, forecasts):
+        """Update already-cached keys from ((server_id, region, forecast_date), text) pairs.
+
+        Keys that aren't cached are skipped and recency is left alone, so a bulk
+        write of next week's forecasts can't push the hot entries out.
+        """
+        expires = time_module.monotonic() + self.ttl
+        with self._lock:
+            for key, forecast_text in forecasts:
+                if key in self._entries:
+                    self._entries[key] = (expires, forecast_text)
+
+    def invalidate(self, server_id, dates=None):
+        """Drop a server's entries, either for the given dates or all of them."""
+        with self._lock:
+            if dates is None:
+                stale = [key for key in self._entries if key[0] == server_id]
+            else:
+                dates = set(dates)
+                stale = [key for key in self._entries if key[0] == server_id and key[2] in dates]
+            for key in stale:
+                del self._entries[key]
+
+    def invalidate_days(self, days):
+        """Drop the entries for a set of (server_id, forecast_date) days, in one pass over the cache."""
+        with self._lock:
+            stale = [key for key in self._entries if (key[0], key[2]) in days]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+forecast_cache = ForecastCache(FORECAST_CACHE_SIZE, FORECAST_CACHE_TTL)
 
 # Initialize SQLite database
 def initialize_database():
-    with sqlite3.connect('weather_bot.db') as conn:
+    enable_incremental_vacuum(db_manager.get())
+    with db_manager.get() as conn:
         c = conn.cursor()
         # Create server_settings table
         c.execute('''CREATE TABLE IF NOT EXISTS server_settings (
                     server_id INTEGER PRIMARY KEY,
                     weather_channel_id INTEGER)''')
+        ensure_column(c, "server_settings", "forecast_seed", "INTEGER")
+        # Seed history: a reroll only changes the days from its effective date on
+        c.execute('''CREATE TABLE IF NOT EXISTS forecast_seed_history (
+                    server_id INTEGER NOT NULL,
+                    effective_from TEXT NOT NULL,
+                    seed INTEGER NOT NULL,
+                    PRIMARY KEY (server_id, effective_from))''')
+        # A seed rerolled before the history existed applied to every date
+        c.execute('''INSERT OR IGNORE INTO forecast_seed_history (server_id, effective_from, seed)
+                     SELECT server_id, '', forecast_seed FROM server_settings WHERE forecast_seed IS NOT NULL''')
 
         # Create weather_forecast table
         c.execute('''CREATE TABLE IF NOT EXISTS weather_forecast (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     server_id INTEGER NOT NULL,
                     forecast_date TEXT NOT NULL,
-                    forecast_text TEXT NOT NULL)''')\
-         # Create weekly_forecast_archive table
-        c.execute('''CREATE TABLE IF NOT EXISTS weekly_forecast_archive (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        server_id INTEGER NOT NULL,
-                        week_start_date TEXT NOT NULL,
-                        week_end_date TEXT NOT NULL,
-                        forecasts TEXT NOT NULL
-                    )''')
+                    forecast_text TEXT NOT NULL,
+                    region TEXT NOT NULL DEFAULT 'coastal',
+                    condition TEXT,
+                    temperature INTEGER,
+                    precipitation TEXT,
+                    cloud_cover TEXT,
+                    wind TEXT,
+                    wind_speed INTEGER,
+                    humidity TEXT,
+                    humidity_value INTEGER,
+                    special TEXT,
+                    magical TEXT)''')
+        ensure_column(c, "weather_forecast", "region", "TEXT NOT NULL DEFAULT 'coastal'")
+        migrate_forecast_unique_index(c)
+        # Parsed condition and temperature, so trends are aggregated in SQL instead of by splitting text
+        added = ensure_column(c, "weather_forecast", "condition", "TEXT")
+        added |= ensure_column(c, "weather_forecast", "temperature", "INTEGER")
+        if added:
+            # Rows this old predate description styles, so their text is always "<condition> and <temp>°F"
+            rows = c.execute('''SELECT id, forecast_text FROM weather_forecast''').fetchall()
+            c.executemany(
+                '''UPDATE weather_forecast SET condition=?, temperature=? WHERE id=?''',
+                [parse_forecast(forecast_text) + (row_id,) for row_id, forecast_text in rows]
+            )
+            db_log.info("Backfilled condition and temperature for %d forecast rows", len(rows))
+        # Covers the trend query: one range scan per server, no table lookups
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_weather_forecast_trends
+                     ON weather_forecast (server_id, forecast_date, region, condition)''')
+        # Structured weather components; older rows and simple-style forecasts leave them NULL
+        for column, definition in COMPONENT_COLUMNS.items():
+            ensure_column(c, "weather_forecast", column, definition)
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_weather_forecast_temperature
+                     ON weather_forecast (server_id, temperature)''')
+        # Most days have no precipitation, special condition or magic, so these only index the days that do;
+        # forecast_date last lets a search read the newest matches straight off the index
+        for column in ("precipitation", "special", "magical"):
+            c.execute(f'''CREATE INDEX IF NOT EXISTS idx_weather_forecast_{column}
+                          ON weather_forecast (server_id, {column}, forecast_date) WHERE {column} IS NOT NULL''')
+        # Lets the daily post load every server's forecast for one date in a single query
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_weather_forecast_date_region
+                     ON weather_forecast (forecast_date, region)''')
+
+        # Create guild_schedule table
+        c.execute('''CREATE TABLE IF NOT EXISTS guild_schedule (
+                    server_id INTEGER PRIMARY KEY,
+                    timezone TEXT NOT NULL,
+                    post_time TEXT NOT NULL DEFAULT '00:00')''')
+
+        # Create post_ledger table: one row per guild, local date and scheduled job
+        c.execute('''CREATE TABLE IF NOT EXISTS post_ledger (
+                    server_id INTEGER NOT NULL,
+                    post_date TEXT NOT NULL,
+                    job TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    claim_token TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (server_id, post_date, job))''')
+
+        # Create forecast_archive table: one row per archived day and region
+        c.execute('''CREATE TABLE IF NOT EXISTS forecast_archive (
+                    server_id INTEGER NOT NULL,
+                    week_start_date TEXT NOT NULL,
+                    forecast_date TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    forecast_text TEXT NOT NULL,
+                    condition TEXT,
+                    temperature INTEGER,
+                    PRIMARY KEY (server_id, forecast_date, region))''')
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_forecast_archive_server_week
+                     ON forecast_archive (server_id, week_start_date)''')
+        # Archived days keep the same structured components as the forecasts they came from
+        for column, definition in COMPONENT_COLUMNS.items():
+            ensure_column(c, "forecast_archive", column, definition)
+        migrate_weekly_archive(c)
+
+        # Retention tier for old weeks: one compressed blob per guild and week
+        c.execute('''CREATE TABLE IF NOT EXISTS forecast_archive_blob (
+                    server_id INTEGER NOT NULL,
+                    week_start_date TEXT NOT NULL,
+                    forecasts BLOB NOT NULL,
+                    PRIMARY KEY (server_id, week_start_date))''')
+        migrate_climate_rollup(c)
+        c.execute('''CREATE TABLE IF NOT EXISTS departed_guilds (
+                    server_id INTEGER PRIMARY KEY,
+                    left_at REAL NOT NULL)''')
         conn.commit()
-    logging.info("Database initialized successfully.")
+    db_log.info("Database initialized successfully.")
+
+def migrate_climate_rollup(cursor):
+    """Create climate_rollup and fill it once from every forecast the database still holds."""
+    exists = cursor.execute(
+        '''SELECT 1 FROM sqlite_master WHERE type='table' AND name=?''', ("climate_rollup",)
+    ).fetchone()
+    if exists:
+        return
+    cursor.execute('''CREATE TABLE climate_rollup (
+                    server_id INTEGER NOT NULL,
+                    period TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    condition TEXT NOT NULL,
+                    days INTEGER NOT NULL,
+                    temp_days INTEGER NOT NULL,
+                    temp_sum INTEGER NOT NULL,
+                    min_temp INTEGER,
+                    max_temp INTEGER,
+                    precip_days INTEGER NOT NULL,
+                    temps TEXT NOT NULL,
+                    PRIMARY KEY (server_id, period, region, condition))''')
+
+    # Oldest tier first, so the live forecast row wins where a day appears twice
+    days = {}
+    for server_id, _, blob in cursor.execute('''SELECT server_id, week_start_date, forecasts FROM forecast_archive_blob''').fetchall():
+        for forecast_date, region, _, condition, temperature, *_ in unpack_week(blob):
+            days[(server_id, forecast_date, region)] = (condition, temperature)
+    for table in ("forecast_archive", "weather_forecast"):
+        for server_id, forecast_date, region, condition, temperature in cursor.execute(
+            f"SELECT server_id, forecast_date, region, condition, temperature FROM {table}"
+        ).fetchall():
+            days[(server_id, forecast_date, region)] = (condition, temperature)
+    deltas = climate_deltas([], [key + value for key, value in days.items()])
+
+    # Monthly summaries from the earlier retention rollup only kept extremes, not every temperature
+    if cursor.execute('''SELECT 1 FROM sqlite_master WHERE type='table' AND name=?''', ("climate_monthly",)).fetchone():
+        for server_id, month, region, condition, count, temp_days, temp_sum, min_temp, max_temp in cursor.execute(
+            '''SELECT server_id, month, region, condition, days, temp_days, temp_sum, min_temp, max_temp FROM climate_monthly'''
+        ).fetchall():
+            delta = deltas.setdefault((server_id, month, region, condition), [0, 0, 0, 0, Counter()])
+            delta[0] += count
+            delta[1] += temp_days
+            delta[2] += temp_sum
+            delta[3] += count if condition in PRECIPITATION_CONDITIONS else 0
+            delta[4].update(temp for temp in (min_temp, max_temp) if temp is not None)
+        cursor.execute('''DROP TABLE climate_monthly''')
+    apply_climate_deltas(cursor, deltas)
+    db_log.info("Built climate rollup from %d forecast days", len(days))
+
+def enable_incremental_vacuum(conn):
+    """Switch the database to incremental auto-vacuum so retention can hand freed pages back to the OS."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # An existing database only picks up the new mode after a full rebuild
+        conn.execute("VACUUM")
+        db_log.info("Enabled incremental auto-vacuum")
+
+def migrate_forecast_unique_index(cursor):
+    """Drop duplicate forecasts (keeping the newest) and enforce one row per server, date and region."""
+    exists = cursor.execute(
+        '''SELECT 1 FROM sqlite_master WHERE type='index' AND name=?''',
+        ("idx_weather_forecast_server_date_region",)
+    ).fetchone()
+    if exists:
+        return
+    cursor.execute('''
+        DELETE FROM weather_forecast
+        WHERE id NOT IN (
+            SELECT MAX(id)
+            FROM weather_forecast
+            GROUP BY server_id, forecast_date, region
+        )''')
+    db_log.info("Removed %d duplicate forecast rows before adding the unique index", cursor.rowcount)
+    cursor.execute('''CREATE UNIQUE INDEX idx_weather_forecast_server_date_region
+                      ON weather_forecast (server_id, forecast_date, region)''')
+
+def migrate_weekly_archive(cursor):
+    """Move archives from the old joined-text weekly_forecast_archive table into forecast_archive."""
+    exists = cursor.execute(
+        '''SELECT 1 FROM sqlite_master WHERE type='table' AND name=?''', ("weekly_forecast_archive",)
+    ).fetchone()
+    if not exists:
+        return
+    rows = []
+    # Oldest first, so a later archive of the same day wins
+    for server_id, week_start_date, forecasts in cursor.execute(
+        '''SELECT server_id, week_start_date, forecasts FROM weekly_forecast_archive ORDER BY id'''
+    ).fetchall():
+        for line in forecasts.splitlines():
+            forecast_date, _, forecast_text = line.partition(": ")
+            if forecast_text:
+                rows.append(archive_row(server_id, week_start_date, forecast_date, "coastal", forecast_text))
+    cursor.executemany(ARCHIVE_ROW_QUERY, rows)
+    cursor.execute('''DROP TABLE weekly_forecast_archive''')
+    db_log.info("Migrated %d archived forecast days out of weekly_forecast_archive", len(rows))
+
+def ensure_column(cursor, table, column, definition):
+    """Add a column to an existing table if an older database is missing it; returns True if added."""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+    return False
+
+# Per-guild posting schedule: server_id -> (ZoneInfo, local post time)
+guild_schedules = {}
+
+def load_guild_schedules():
+    """Load every guild's timezone and posting time."""
+    rows = db_execute('''SELECT server_id, timezone, post_time FROM guild_schedule''', fetchall=True) or []
+    schedules = {}
+    for server_id, tz_name, post_time in rows:
+        try:
+            schedules[server_id] = (ZoneInfo(tz_name), time.fromisoformat(post_time))
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            jobs_log.warning("Ignoring invalid schedule for server %s: %s", server_id, e)
+    return schedules
 
-# Set the timezone to US/Central
-def is_dst():
-    today = datetime.now()
-    dst_start = datetime(today.year, 3, 8) + timedelta(days=(6 - datetime(today.year, 3, 8).weekday()))
-    dst_end = datetime(today.year, 11, 1) + timedelta(days=(6 - datetime(today.year, 11, 1).weekday()))
-    return dst_start <= today < dst_end
+def get_guild_schedule(server_id):
+    """Return the guild's (timezone, post time), falling back to US Central midnight."""
+    return guild_schedules.get(server_id) or (ZoneInfo(DEFAULT_TIMEZONE), DEFAULT_POST_TIME)
 
-def get_timezone_offset():
-    return timedelta(hours=-5) if is_dst() else timedelta(hours=-6)
+def guild_now(server_id):
+    """Current time in the guild's timezone."""
+    return datetime.now(get_guild_schedule(server_id)[0])
 
 # Button and View classes
+def timed_button(label, callback):
+    """Wrap a button callback so every press is recorded in HANDLER_SECONDS."""
+    @functools.wraps(callback)
+    async def timed(interaction):
+        started = time_module.perf_counter()
+        status = "error"
+        try:
+            await callback(interaction)
+            status = "ok"
+        finally:
+            HANDLER_SECONDS.observe(time_module.perf_counter() - started, "button", label, status)
+    return timed
+
 class MainMenuView(View):
     def __init__(self, ctx):
         super().__init__(timeout=120)
         self.ctx = ctx
         self.server_id = ctx.guild.id
+        for item in self.children:
+            item.callback = timed_button(item.label, item.callback)
 
     @button(label="📖 Read Weather", style=discord.ButtonStyle.primary)
     async def read_weather_btn(self, interaction: discord.Interaction, button: Button):
         # Instead of calling the command directly, respond with the same logic
         server_id = interaction.guild.id
-        now = datetime.now()
+        now = guild_now(server_id)
         
         # Get today and tomorrow's dates
         today = now.strftime("%Y-%m-%d")
         tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
         
-        # Use DISTINCT to ensure we only get one entry per date
-        query = '''
-            SELECT DISTINCT forecast_date, forecast_text
-            FROM weather_forecast
-            WHERE server_id=? AND forecast_date IN (?, ?)
-            ORDER BY forecast_date
-        '''
-        result = db_execute(query, (server_id, today, tomorrow), fetchall=True)
+        result = await fetch_forecasts(server_id, [today, tomorrow])
 
         if result:
             forecast_lines = [
@@ -164,26 +611,13 @@ class MainMenuView(View):
     @button(label="📅 7-Day Forecast", style=discord.ButtonStyle.primary)
     async def view_forecast_btn(self, interaction: discord.Interaction, button: Button):
         server_id = interaction.guild.id
-        start_date = datetime.now()
+        start_date = guild_now(server_id)
         
         date_list = [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
-
-        # Use DISTINCT to ensure we only get one entry per date
-        placeholders = ",".join("?" for _ in date_list)
-        query = f'''
-            SELECT DISTINCT forecast_date, forecast_text
-            FROM weather_forecast
-            WHERE server_id=? AND forecast_date IN ({placeholders})
-            ORDER BY forecast_date
-        '''
-        result = db_execute(query, (server_id, *date_list), fetchall=True)
+        result = await fetch_forecasts(server_id, date_list)
 
         if result:
-            forecast_lines = [
-                f"📅 **{format_golarion_date(datetime.strptime(row[0], '%Y-%m-%d'))}**\n{row[1]}"
-                for row in result
-            ]
-            await interaction.response.send_message(f"🌤 **7-Day Forecast**:\n\n" + "\n\n".join(forecast_lines))
+            await interaction.response.send_message(format_forecast_week(result))
         else:
             await interaction.response.send_message("⚠️ No forecast data found for the upcoming 7 days.")
 
@@ -195,19 +629,7 @@ class MainMenuView(View):
             return
             
         server_id = interaction.guild.id
-        current_date = datetime.now()
-        season = "spring"  # You can determine the season based on the current date
-
-        for day in range(0, 7):  # <-- Start from 0 to include today
-            forecast_date = (current_date + timedelta(days=day)).strftime("%Y-%m-%d")
-            forecast_text = generate_daily_forecast(season, "coastal")
-
-            db_execute(
-                '''INSERT INTO weather_forecast (server_id, forecast_date, forecast_text) VALUES (?, ?, ?)''',
-                (server_id, forecast_date, forecast_text)
-            )
-
-            logging.info(f"Generated forecast for server {server_id} on {forecast_date}: {forecast_text}")
+        await run_db(generate_weekly_forecast, server_id, guild_now(server_id).replace(tzinfo=None), reroll=True)
 
         await interaction.response.send_message("📅 One-week forecast generated.")
 
@@ -221,7 +643,7 @@ class MainMenuView(View):
         server_id = interaction.guild.id
         
         # Get the configured weather channel
-        result = db_execute(
+        result = await db_execute_async(
             '''SELECT weather_channel_id FROM server_settings WHERE server_id=?''',
             (server_id,), fetchone=True
         )
@@ -237,35 +659,19 @@ class MainMenuView(View):
             await interaction.response.send_message(f"❌ Could not find the configured weather channel. Please use `!set_weather_channel` to set a new one.")
             return
         
-        # Get current time in Central timezone
-        central = pytz.timezone("US/Central")
-        now = datetime.now(central)
+        # Get current time in the guild's timezone
+        now = guild_now(server_id)
         today_date = now.strftime("%Y-%m-%d")
         
         # Get Golarion day name for today
         golarion_day = GOLARION_DAYS[now.weekday()]
         
         # Get today's forecast
-        forecast = db_execute(
-            '''SELECT forecast_text FROM weather_forecast 
-               WHERE server_id=? AND forecast_date=?''',
-            (server_id, today_date), fetchone=True
-        )
+        coastal_forecast, forest_forecast = await run_db(get_daily_report_forecasts, server_id, today_date)
         
         try:
-            if forecast:
-                # Parse the forecast text to get weather type and temperature
-                coastal_forecast = forecast[0]
-                
-                # Generate a different forecast for the forest region
-                forest_forecast = generate_daily_forecast("spring", "forest")
-                
-                # Format the message according to the preferred template
-                weather_message = f"\n**Daily Weather Report ({golarion_day})** \n"
-                weather_message += f"• Coastal Region: {coastal_forecast} \n"
-                weather_message += f"• Fiereni Forest: {forest_forecast} \n"
-                weather_message += "*May the winds favor your travels!*"
-                
+            if coastal_forecast:
+                weather_message = format_daily_report(golarion_day, coastal_forecast, forest_forecast)
                 await channel.send(weather_message)
                 await interaction.response.send_message(f"✅ Weather update for today has been manually posted to {channel.mention}")
             else:
@@ -274,7 +680,7 @@ class MainMenuView(View):
             await interaction.response.send_message(f"❌ Missing permissions to post in {channel.mention}.")
         except Exception as e:
             await interaction.response.send_message(f"❌ Error posting forecast: {str(e)}")
-            logging.error(f"Failed to manually post forecast: {e}")
+            commands_log.error("Failed to manually post forecast: %s", e)
 
     @button(label="📌 Set Weather Channel", style=discord.ButtonStyle.success)
     async def set_channel_btn(self, interaction: discord.Interaction, button: Button):
@@ -287,7 +693,7 @@ class MainMenuView(View):
             await interaction.response.send_message("❌ You do not have permission to use this command.", ephemeral=True)
             return
             
-        result = db_execute('''SELECT weather_channel_id FROM server_settings WHERE server_id=?''', (interaction.guild.id,), fetchone=True)
+        result = await db_execute_async('''SELECT weather_channel_id FROM server_settings WHERE server_id=?''', (interaction.guild.id,), fetchone=True)
         if result and (channel := interaction.client.get_channel(result[0])):
             await interaction.response.send_message(f"📌 Current weather channel: {channel.mention}")
         else:
@@ -305,70 +711,880 @@ async def weather_help(ctx):
     help_command.context = await bot.get_context(ctx.message)
     await help_command.send_bot_help(bot.all_commands)
 
-# Generate base weather
-def generate_base_weather(season, location):
-    config = SEASONS[season]
-    temp_range = config["temp_range"]
-    weather_types = config["weather_types"].copy()
+# Seeded forecasts: each day is derived from the guild seed in effect on that date, the date and the region
+forecast_seeds = {}  # server_id -> [(effective_from, seed)] in date order
+
+def get_forecast_seed(server_id, forecast_date):
+    """Return the seed the guild's forecast for forecast_date derives from; the server id until the first reroll."""
+    if server_id not in forecast_seeds:
+        forecast_seeds[server_id] = db_execute(
+            '''SELECT effective_from, seed FROM forecast_seed_history WHERE server_id=? ORDER BY effective_from''',
+            (server_id,), fetchall=True
+        ) or []
+    for effective_from, seed in reversed(forecast_seeds[server_id]):
+        if effective_from <= forecast_date:
+            return seed
+    return server_id
+
+def reroll_forecast_seed(server_id, effective_from):
+    """Pick a new forecast seed for the guild's days from effective_from on; earlier days keep theirs."""
+    seed = random.getrandbits(63)
+    db_execute(
+        '''INSERT INTO forecast_seed_history (server_id, effective_from, seed) VALUES (?, ?, ?)
+           ON CONFLICT(server_id, effective_from) DO UPDATE SET seed=excluded.seed''',
+        (server_id, effective_from, seed)
+    )
+    forecast_seeds.pop(server_id, None)
+    return seed
+
+@lru_cache(maxsize=4096)
+def seeded_daily_forecast(seed, forecast_date, region):
+    """Deterministically generate one day's forecast for a seed, date and region."""
+    rng = random.Random(f"{seed}:{forecast_date}:{region}")
+    season = "spring"  # You can determine the season based on the forecast date
+    return generate_daily_forecast(season, region, rng)
+
+def reroll_seeded_forecast(server_id, start_date):
+    """Regenerate a seeded guild: new seed, and drop overrides from start_date onward.
+
+    Days the daily post has already sent are kept, so the reroll starts after
+    the latest of them if that is later than start_date. Returns the date the
+    new seed applies from.
+    """
+    posted = db_execute(
+        '''SELECT MAX(post_date) FROM post_ledger WHERE server_id=? AND job=? AND status=?''',
+        (server_id, "daily_post", "sent"), fetchone=True
+    )
+    if posted and posted[0] and posted[0] >= start_date:
+        start_date = (datetime.strptime(posted[0], "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    reroll_forecast_seed(server_id, start_date)
+    conn = db_manager.get()
+    with conn:
+        removed = conn.execute(
+            '''SELECT server_id, forecast_date, region, condition, temperature FROM weather_forecast
+               WHERE server_id=? AND forecast_date>=?''',
+            (server_id, start_date)
+        ).fetchall()
+        conn.execute('''DELETE FROM weather_forecast WHERE server_id=? AND forecast_date>=?''', (server_id, start_date))
+        apply_climate_deltas(conn, climate_deltas(removed, []))
+    forecast_cache.invalidate(server_id)
+    generation_log.info("Rerolled seeded forecast for server %s from %s", server_id, start_date)
+    return start_date
+
+# Climate rollup: per guild, month, region and condition, kept in step with every forecast write.
+# Days are (server_id, forecast_date, region, condition, temperature) tuples.
+def climate_deltas(removed, added):
+    """Return the net rollup change of replacing the ``removed`` days with the ``added`` ones.
+
+    Maps (server_id, period, region, condition) to [days, temp_days, temp_sum,
+    precip_days, Counter of temperatures].
+    """
+    deltas = {}
+    for sign, days in ((-1, removed), (1, added)):
+        for server_id, forecast_date, region, condition, temperature in days:
+            delta = deltas.setdefault((server_id, forecast_date[:7], region, condition or "other"), [0, 0, 0, 0, Counter()])
+            delta[0] += sign
+            if condition in PRECIPITATION_CONDITIONS:
+                delta[3] += sign
+            if temperature is not None:
+                delta[1] += sign
+                delta[2] += sign * temperature
+                delta[4][temperature] += sign
+    return deltas
+
+# Match rows against a JSON array of key arrays
+ROLLUP_ROWS_QUERY = '''
+    SELECT r.server_id, r.period, r.region, r.condition, r.days, r.temp_days, r.temp_sum, r.precip_days, r.temps
+    FROM json_each(?) AS k
+    JOIN climate_rollup AS r
+      ON r.server_id=json_extract(k.value, '$[0]') AND r.period=json_extract(k.value, '$[1]')
+     AND r.region=json_extract(k.value, '$[2]') AND r.condition=json_extract(k.value, '$[3]')
+'''
+STORED_DAYS_QUERY = '''
+    SELECT w.server_id, w.forecast_date, w.region, w.condition, w.temperature
+    FROM json_each(?) AS k
+    JOIN weather_forecast AS w
+      ON w.server_id=json_extract(k.value, '$[0]') AND w.forecast_date=json_extract(k.value, '$[1]')
+     AND w.region=json_extract(k.value, '$[2]')
+'''
+
+def apply_climate_deltas(conn, deltas):
+    """Fold deltas into climate_rollup; call inside the transaction that changes the forecasts.
+
+    Each row keeps a histogram of its temperatures, so min and max stay exact
+    when a day is replaced.
+    """
+    if not deltas:
+        return
+    current = {
+        tuple(row[:4]): row[4:]
+        for row in conn.execute(ROLLUP_ROWS_QUERY, (json.dumps([list(key) for key in deltas]),))
+    }
+    upserts, deletes = [], []
+    for key, (days, temp_days, temp_sum, precip_days, temps) in deltas.items():
+        old_days, old_temp_days, old_temp_sum, old_precip_days, old_temps = current.get(key, (0, 0, 0, 0, "{}"))
+        histogram = Counter({int(temp): count for temp, count in json.loads(old_temps).items()})
+        histogram.update(temps)
+        histogram = +histogram  # Drop temperatures no longer present
+        days += old_days
+        if days <= 0:
+            deletes.append(key)
+            continue
+        upserts.append(key + (
+            days, old_temp_days + temp_days, old_temp_sum + temp_sum,
+            min(histogram) if histogram else None, max(histogram) if histogram else None,
+            old_precip_days + precip_days, json.dumps(histogram, sort_keys=True),
+        ))
+    conn.executemany(
+        '''INSERT OR REPLACE INTO climate_rollup
+           (server_id, period, region, condition, days, temp_days, temp_sum, min_temp, max_temp, precip_days, temps)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        upserts
+    )
+    conn.executemany(
+        '''DELETE FROM climate_rollup WHERE server_id=? AND period=? AND region=? AND condition=?''', deletes
+    )
 
-    modifier = -5 if location == "coastal" else -3
-    temp_range = (temp_range[0] + modifier, temp_range[1] + modifier)
+def stored_days(conn, keys):
+    """Return the stored (server_id, forecast_date, region, condition, temperature) days for the given keys."""
+    return conn.execute(STORED_DAYS_QUERY, (json.dumps([list(key) for key in keys]),)).fetchall()
 
-    if location == "coastal":
-        weather_types += ["stormy", "humid"] * 3
-    elif location == "forest":
-        weather_types += ["foggy", "misty"] * 2
+# Insert or replace the forecast for a server, date and region
+COMPONENT_COLUMNS = {
+    "precipitation": "TEXT", "cloud_cover": "TEXT", "wind": "TEXT", "wind_speed": "INTEGER",
+    "humidity": "TEXT", "humidity_value": "INTEGER", "special": "TEXT", "magical": "TEXT",
+}
+FORECAST_COLUMNS = ("server_id", "forecast_date", "region", "forecast_text", "condition", "temperature") + COMPONENT_FIELDS
+UPSERT_FORECAST_QUERY = f'''
+    INSERT INTO weather_forecast ({", ".join(FORECAST_COLUMNS)})
+    VALUES ({", ".join("?" for _ in FORECAST_COLUMNS)})
+    ON CONFLICT(server_id, forecast_date, region) DO UPDATE SET
+        {", ".join(f"{column}=excluded.{column}" for column in FORECAST_COLUMNS[3:])}
+'''
+
+def write_forecasts(rows):
+    """Write (server_id, forecast_date, region, forecast_text, components) rows in a single transaction.
+
+    Returns (rows_written, elapsed_seconds). Nothing is written if any row fails;
+    the database error is logged and re-raised so callers never mistake it for success.
+    """
+    started = time_module.perf_counter()
+    # One row per key, last one wins, so the rollup sees exactly what the upsert keeps
+    rows = list({(row[0], row[1], row[2]): row for row in rows}.values())
+    conn = db_manager.get()
+    try:
+        with conn:
+            replaced = stored_days(conn, [row[:3] for row in rows])
+            params = [row[:4] + forecast_fields(row[3], row[4]) for row in rows]
+            conn.executemany(UPSERT_FORECAST_QUERY, params)
+            apply_climate_deltas(conn, climate_deltas(replaced, [values[:3] + values[4:6] for values in params]))
+        written = len(rows)
+        FORECASTS_WRITTEN.inc(amount=written)
+        forecast_cache.refresh(
+            ((server_id, region, forecast_date), forecast_text) for server_id, forecast_date, region, forecast_text, _ in rows
+        )
+    except sqlite3.Error as e:
+        generation_log.error("Database error while writing %d forecast rows: %s", len(rows), e)
+        raise
+    elapsed = time_module.perf_counter() - started
+    generation_log.info("Wrote %d forecast rows in %.1f ms", written, elapsed * 1000)
+    return written, elapsed
+
+def generate_weekly_forecast(server_id, start_date, reroll=False, trend=None):
+    """Generate the 7 days starting at start_date; seeded guilds only reroll when asked."""
+    if FORECAST_MODE == "seeded":
+        if reroll:
+            reroll_seeded_forecast(server_id, start_date.strftime("%Y-%m-%d"))
+        return 0, 0.0
+    return write_forecasts(build_weekly_forecast_rows(server_id, start_date, trend, FORECAST_STYLE))
+
+# Climate statistics read from the rollup
+def get_climate_stats(server_id, first_period, last_period, today=None):
+    """Summarize months first_period..last_period (YYYY-MM) per region from climate_rollup.
+
+    Counts both regions' days up to ``today`` (default: the guild's local
+    date) in either mode: stored days after it are taken back out of the
+    rollup, and seeded guilds add the days their seed has posted. Returns
+    {region: {"days", "temp_days", "temp_sum", "min_temp", "max_temp",
+    "precip_days", "conditions": {condition: days}}}.
+    """
+    # (region, condition) -> [days, temp_days, temp_sum, precip_days, Counter of temperatures], as in climate_deltas
+    totals = {}
+    for region, condition, days, temp_days, temp_sum, precip_days, temps in db_execute(
+        '''SELECT region, condition, days, temp_days, temp_sum, precip_days, temps
+           FROM climate_rollup
+           WHERE server_id=? AND period BETWEEN ? AND ?''',
+        (server_id, first_period, last_period), fetchall=True
+    ) or []:
+        total = totals.setdefault((region, condition), [0, 0, 0, 0, Counter()])
+        total[0] += days
+        total[1] += temp_days
+        total[2] += temp_sum
+        total[3] += precip_days
+        total[4].update({int(temp): count for temp, count in json.loads(temps).items()})
+
+    first = datetime.strptime(first_period, "%Y-%m")
+    month_index = int(last_period[:4]) * 12 + int(last_period[5:7])
+    end = datetime(month_index // 12, month_index % 12 + 1, 1)
+    today = today or guild_now(server_id).replace(tzinfo=None)
+    tomorrow = datetime.combine(today.date(), time(0, 0)) + timedelta(days=1)
+    # Weekly generation stores days ahead of today; they are in the rollup but haven't happened yet
+    future = db_execute(
+        '''SELECT server_id, forecast_date, region, condition, temperature FROM weather_forecast
+           WHERE server_id=? AND forecast_date>=? AND forecast_date<?''',
+        (server_id, tomorrow.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")), fetchall=True
+    ) or []
+    seeded = []
+    if FORECAST_MODE == "seeded":
+        # Seeded days are never stored; add the days already posted that have no override, from the seed
+        end = min(end, tomorrow)
+        keys = [
+            (server_id, (first + timedelta(days=i)).strftime("%Y-%m-%d"), region)
+            for i in range(max(0, (end - first).days)) for region in ("coastal", "forest")
+        ]
+        stored = {day[1:3] for day in stored_days(db_manager.get(), keys)}
+        seeded = [
+            key + parse_forecast(seeded_daily_forecast(get_forecast_seed(server_id, key[1]), key[1], key[2]))
+            for key in keys if key[1:] not in stored
+        ]
+    for (_, _, region, condition), delta in climate_deltas(future, seeded).items():
+        total = totals.setdefault((region, condition), [0, 0, 0, 0, Counter()])
+        for index in range(4):
+            total[index] += delta[index]
+        total[4].update(delta[4])
+
+    stats = {}
+    for (region, condition), (days, temp_days, temp_sum, precip_days, temps) in totals.items():
+        if days <= 0:
+            continue
+        temps = +temps  # Drop temperatures only future days had
+        region_stats = stats.setdefault(region, {
+            "days": 0, "temp_days": 0, "temp_sum": 0, "min_temp": None, "max_temp": None,
+            "precip_days": 0, "conditions": {},
+        })
+        region_stats["days"] += days
+        region_stats["temp_days"] += temp_days
+        region_stats["temp_sum"] += temp_sum
+        region_stats["precip_days"] += precip_days
+        region_stats["conditions"][condition] = region_stats["conditions"].get(condition, 0) + days
+        if temps:
+            region_stats["min_temp"] = min(temps) if region_stats["min_temp"] is None else min(region_stats["min_temp"], min(temps))
+            region_stats["max_temp"] = max(temps) if region_stats["max_temp"] is None else max(region_stats["max_temp"], max(temps))
+    return stats
+
+# Weather trends over recent stored forecasts
+TREND_MAX_DAYS = RETENTION_HOT_WEEKS * 7  # Older days only survive as compressed blobs
+
+def get_weather_trends(server_id, days=7, today=None):
+    """Count conditions per region over the last ``days`` days, up to ``today`` (default: the guild's local date).
+
+    Returns {region: {condition: count}}.
+    """
+    today = today or guild_now(server_id).replace(tzinfo=None)
+    start = (today - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    end = today.strftime("%Y-%m-%d")
+    rows = db_execute(
+        '''SELECT region, condition, COUNT(*) FROM weather_forecast
+           WHERE server_id=? AND forecast_date BETWEEN ? AND ? AND condition IS NOT NULL
+           GROUP BY region, condition''',
+        (server_id, start, end), fetchall=True
+    ) or []
+    trends = {}
+    for region, condition, count in rows:
+        trends.setdefault(region, {})[condition] = count
+    if FORECAST_MODE == "seeded":
+        # Seeded days are not stored; count both regions' days without an override from the seed
+        stored = set(db_execute(
+            '''SELECT forecast_date, region FROM weather_forecast
+               WHERE server_id=? AND forecast_date BETWEEN ? AND ?''',
+            (server_id, start, end), fetchall=True
+        ) or [])
+        for offset in range(days):
+            date_str = (today - timedelta(days=offset)).strftime("%Y-%m-%d")
+            for region in ("coastal", "forest"):
+                if (date_str, region) not in stored:
+                    condition, _ = parse_forecast(seeded_daily_forecast(get_forecast_seed(server_id, date_str), date_str, region))
+                    counts = trends.setdefault(region, {})
+                    counts[condition] = counts.get(condition, 0) + 1
+    return trends
+
+# Component searches; every filter is answered from an index on weather_forecast
+SEARCH_TEMPERATURE_FILTERS = {
+    "freezing": "temperature <= 32",
+    "hot": "temperature >= 90",
+}
+SEARCH_LIMIT = 10
+
+def search_forecasts(server_id, search_filter, value=None, limit=SEARCH_LIMIT):
+    """Return the latest (forecast_date, region, forecast_text) rows matching a search filter."""
+    if search_filter in SEARCH_TEMPERATURE_FILTERS:
+        clause, params = SEARCH_TEMPERATURE_FILTERS[search_filter], (server_id, limit)
+    else:
+        # Filter names come from SEARCHABLE_COMPONENTS, so only the value is user input
+        clause, params = f"{search_filter} = ?", (server_id, value, limit)
+    return db_execute(
+        f'''SELECT forecast_date, region, forecast_text FROM weather_forecast
+            WHERE server_id=? AND {clause}
+            ORDER BY forecast_date DESC LIMIT ?''',
+        params, fetchall=True
+    ) or []
+
+def trend_weights(trends):
+    """Turn {region: {condition: count}} into {region: {condition: share}} for generation."""
+    return {
+        region: {condition: count / sum(counts.values()) for condition, count in counts.items()}
+        for region, counts in trends.items()
+    }
+
+def archive_fleet(server_ids, start_date):
+    """Archive the week before start_date for every guild; returns the number of archived days."""
+    return archive_weeks(server_ids, start_date - timedelta(days=1)) if server_ids else 0
+
+# Weekly generation runs in worker processes so the event loop and database thread stay free
+generation_pool = None
+
+def get_generation_pool():
+    """Start the generation worker pool on first use."""
+    global generation_pool
+    if generation_pool is None:
+        # Spawn, not fork: this process already runs the event loop, the database thread and the
+        # logging listener, and a forked child can deadlock on a lock one of them held
+        generation_pool = ProcessPoolExecutor(
+            max_workers=GENERATION_WORKERS, initializer=warm_tables, mp_context=multiprocessing.get_context("spawn")
+        )
+    return generation_pool
 
-    return random.choice(weather_types), random.randint(temp_range[0], temp_range[1])
+async def generate_fleet(server_ids, start_date):
+    """Generate the week for many guilds in chunks on the worker pool, streaming each chunk to the writer.
 
-# Generate daily forecast
-def generate_daily_forecast(season, location):
-    weather_type, temperature = generate_base_weather(season, location)
-    return f"{weather_type} and {temperature}°F"
+    A chunk that fails to generate or commit doesn't stop the others. Returns
+    (rows_written, elapsed_seconds, failed_server_ids), where the failed ids are
+    the guilds whose rows were not committed.
+    """
+    started = time_module.perf_counter()
+    chunks = [server_ids[i:i + GENERATION_CHUNK_SIZE] for i in range(0, len(server_ids), GENERATION_CHUNK_SIZE)]
+
+    async def write_chunk(chunk, generated):
+        try:
+            return (await run_db(write_forecasts, await generated))[0], []
+        except Exception as e:
+            generation_log.error("Weekly generation failed for a chunk of %d guilds: %s", len(chunk), e)
+            return 0, chunk
+
+    results = []
+    if GENERATION_WORKERS > 0:
+        loop = asyncio.get_running_loop()
+        pool = get_generation_pool()
+        pending = [
+            write_chunk(chunk, loop.run_in_executor(pool, generate_weekly_chunk, chunk, start_date, FORECAST_STYLE))
+            for chunk in chunks
+        ]
+        # Write chunks in completion order; the single database thread serializes the writes
+        for finished in asyncio.as_completed(pending):
+            results.append(await finished)
+    else:
+        for chunk in chunks:
+            results.append(await write_chunk(chunk, run_db(generate_weekly_chunk, chunk, start_date, FORECAST_STYLE)))
+    written = sum(count for count, _ in results)
+    failed = [server_id for _, chunk in results for server_id in chunk]
+    elapsed = time_module.perf_counter() - started
+    if elapsed:
+        GENERATION_RATE.set(len(server_ids) / elapsed)
+    generation_log.info(
+        "Generated %d guild weeks in %d chunks in %.2fs (%.0f guilds/s)",
+        len(server_ids), len(chunks), elapsed, len(server_ids) / elapsed if elapsed else 0
+    )
+    return written, elapsed, failed
+
+def set_forecast_override(server_id, forecast_date, forecast_text, region="coastal"):
+    """Replace whatever is stored for a date with an admin-provided forecast."""
+    write_forecasts([(server_id, forecast_date, region, forecast_text, None)])
+
+def get_forecasts(server_id, dates, region="coastal"):
+    """Return (forecast_date, forecast_text) rows for the given dates, reading through the cache."""
+    found, missing = forecast_cache.get_many(server_id, region, dates)
+    if missing:
+        found.update(cache_missing_forecasts(server_id, missing, region))
+    return [(date_str, found[date_str]) for date_str in sorted(dates) if found[date_str] is not None]
+
+async def fetch_forecasts(server_id, dates, region="coastal"):
+    """Awaitable get_forecasts that answers cache hits without leaving the event loop."""
+    found, missing = forecast_cache.get_many(server_id, region, dates)
+    if missing:
+        found.update(await run_db(cache_missing_forecasts, server_id, missing, region))
+    return [(date_str, found[date_str]) for date_str in sorted(dates) if found[date_str] is not None]
+
+def cache_missing_forecasts(server_id, dates, region):
+    """Load cache misses from the database and remember them, including dates with no forecast."""
+    loaded = dict(load_forecasts(server_id, dates, region))
+    loaded = {date_str: loaded.get(date_str) for date_str in dates}
+    forecast_cache.put_many(server_id, region, loaded)
+    return loaded
+
+def load_forecasts(server_id, dates, region="coastal"):
+    """Load (forecast_date, forecast_text) rows for the given dates from the database.
+
+    Stored rows always win, so in seeded mode they act as admin overrides and
+    any date without a row is computed from the guild seed.
+    """
+    placeholders = ",".join("?" for _ in dates)
+    query = f'''
+        SELECT forecast_date, forecast_text
+        FROM weather_forecast
+        WHERE server_id=? AND region=? AND forecast_date IN ({placeholders})
+        ORDER BY forecast_date
+    '''
+    result = db_execute(query, (server_id, region, *dates), fetchall=True) or []
+    if FORECAST_MODE != "seeded":
+        return result
+
+    stored = dict(result)
+    return [
+        (date_str, stored[date_str] if date_str in stored
+         else seeded_daily_forecast(get_forecast_seed(server_id, date_str), date_str, region))
+        for date_str in sorted(dates)
+    ]
+
+def get_daily_report_forecasts(server_id, date_str):
+    """Return the (coastal, forest) forecasts for the daily report, coastal is None if missing."""
+    result = get_forecasts(server_id, [date_str])
+    coastal_forecast = result[0][1] if result else None
+    if FORECAST_MODE == "seeded":
+        forest_forecast = get_forecasts(server_id, [date_str], "forest")[0][1]
+    else:
+        # Generate a different forecast for the forest region
+        forest_forecast = generate_daily_forecast("spring", "forest")
+    return coastal_forecast, forest_forecast
+
+def load_daily_post_targets(server_ids, date_str):
+    """Load channels and forecasts for many servers with two bulk queries.
+
+    Returns {server_id: (channel_id, coastal_forecast, forest_forecast)} for
+    servers that have a weather channel; coastal_forecast is None if missing.
+    """
+    # Both queries only touch the batch's servers (a JSON array of ids), not the whole fleet
+    ids = json.dumps(list(server_ids))
+    channels = dict(db_execute(
+        '''SELECT server_id, weather_channel_id FROM server_settings
+           WHERE server_id IN (SELECT value FROM json_each(?)) AND weather_channel_id IS NOT NULL''',
+        (ids,), fetchall=True
+    ) or [])
+    stored = {}
+    for server_id, region, forecast_text in db_execute(
+        '''SELECT server_id, region, forecast_text FROM weather_forecast
+           WHERE server_id IN (SELECT value FROM json_each(?)) AND forecast_date=? AND region IN ('coastal', 'forest')''',
+        (ids, date_str), fetchall=True
+    ) or []:
+        if server_id in channels:
+            stored[(server_id, region)] = forecast_text
+
+    targets = {}
+    for server_id, channel_id in channels.items():
+        coastal_forecast = stored.get((server_id, "coastal"))
+        forest_forecast = stored.get((server_id, "forest"))
+        if FORECAST_MODE == "seeded":
+            seed = get_forecast_seed(server_id, date_str)
+            coastal_forecast = coastal_forecast or seeded_daily_forecast(seed, date_str, "coastal")
+            forest_forecast = forest_forecast or seeded_daily_forecast(seed, date_str, "forest")
+        elif not forest_forecast:
+            # Generate a different forecast for the forest region
+            forest_forecast = generate_daily_forecast("spring", "forest")
+        targets[server_id] = (channel_id, coastal_forecast, forest_forecast)
+    return targets
+
+def format_daily_report(golarion_day, coastal_forecast, forest_forecast):
+    """Format the daily weather report according to the preferred template."""
+    weather_message = f"\n**Daily Weather Report ({golarion_day})** \n"
+    weather_message += f"• Coastal Region: {coastal_forecast} \n"
+    weather_message += f"• Fiereni Forest: {forest_forecast} \n"
+    weather_message += "*May the winds favor your travels!*"
+    return weather_message
+
+# Post ledger: records each scheduled run so restarts neither repeat nor drop it
+CLAIM_POSTS_QUERY = '''INSERT INTO post_ledger (server_id, post_date, job, status, attempts, claim_token, updated_at)
+                         VALUES (?, ?, ?, 'pending', 1, ?, ?)
+                         ON CONFLICT(server_id, post_date, job) DO UPDATE SET
+                             status='pending', attempts=attempts + 1,
+                             claim_token=excluded.claim_token, updated_at=excluded.updated_at
+                         WHERE post_ledger.status='failed'
+                            OR (post_ledger.status='pending' AND post_ledger.updated_at < ?)'''
+
+def claim_posts(server_ids, post_date, job):
+    """Atomically claim a job's slot for each server on a date; returns the servers this run owns.
+
+    A slot is free if it has no ledger row, its last attempt failed, or an
+    earlier claim was never finished within POST_CLAIM_TIMEOUT (the process
+    died mid-run). Sent and skipped slots are never claimed again.
+    """
+    if not server_ids:
+        return []
+    token = uuid.uuid4().hex
+    now = time_module.time()
+    conn = db_manager.get()
+    with conn:
+        conn.executemany(
+            CLAIM_POSTS_QUERY,
+            [(server_id, post_date, job, token, now, now - POST_CLAIM_TIMEOUT) for server_id in server_ids]
+        )
+        claimed = conn.execute(
+            '''SELECT server_id FROM post_ledger WHERE post_date=? AND job=? AND claim_token=?''',
+            (post_date, job, token)
+        ).fetchall()
+    return [server_id for server_id, in claimed]
+
+def record_posts(outcomes, job):
+    """Record (server_id, post_date, status) outcomes for claimed slots in one transaction."""
+    if not outcomes:
+        return
+    now = time_module.time()
+    conn = db_manager.get()
+    with conn:
+        conn.executemany(
+            '''UPDATE post_ledger SET status=?, updated_at=? WHERE server_id=? AND post_date=? AND job=?''',
+            [(status, now, server_id, post_date, job) for server_id, post_date, status in outcomes]
+        )
+
+def find_catch_up_entries(entries, job):
+    """Filter (guild_id, fire_time, post_date) runs down to the ones startup should make up.
+
+    Guilds the ledger has never recorded for the job are left alone, so
+    deploying the ledger does not replay posts that already went out. A
+    weekly generation is also made up wherever that week was never written.
+    """
+    tracked = {
+        server_id
+        for server_id, in db_execute('''SELECT DISTINCT server_id FROM post_ledger WHERE job=?''', (job,), fetchall=True) or []
+    }
+    if job == "weekly_generate" and FORECAST_MODE != "seeded":
+        for post_date in {post_date for _, _, post_date in entries}:
+            written = db_execute(
+                '''SELECT server_id FROM weather_forecast WHERE forecast_date=? AND region=?''',
+                (post_date, "coastal"), fetchall=True
+            ) or []
+            written = {server_id for server_id, in written}
+            tracked.update(guild_id for guild_id, _, date_str in entries if date_str == post_date and guild_id not in written)
+    return [(guild_id, fire_time) for guild_id, fire_time, _ in entries if guild_id in tracked]
+
+def find_pending_claims(entries, job):
+    """Return {guild_id: updated_at} for (guild_id, fire_time, post_date) runs whose claim is still pending."""
+    if not entries:
+        return {}
+    rows = db_execute(
+        '''SELECT l.server_id, l.updated_at
+           FROM json_each(?) AS k
+           JOIN post_ledger AS l
+             ON l.server_id=json_extract(k.value, '$[0]') AND l.post_date=json_extract(k.value, '$[1]')
+           WHERE l.job=? AND l.status=?''',
+        (json.dumps([[guild_id, post_date] for guild_id, _, post_date in entries]), job, "pending"), fetchall=True
+    ) or []
+    return dict(rows)
+
+def prune_post_ledger(before_date):
+    """Drop ledger rows older than before_date; they can no longer be caught up."""
+    conn = db_manager.get()
+    with conn:
+        return conn.execute('''DELETE FROM post_ledger WHERE post_date < ?''', (before_date,)).rowcount
 
 def db_execute(query, params=(), fetchone=False, fetchall=False):
+    conn = db_manager.get()
+    started = time_module.perf_counter()
     try:
-        with sqlite3.connect('weather_bot.db') as conn:
-            c = conn.cursor()
-            logging.info(f"Executing query: {query} with params: {params}")
-            c.execute(query, params)
-            if fetchone:
-                return c.fetchone()
-            if fetchall:
-                return c.fetchall()
-            conn.commit()
+        db_log.debug("Executing query: %s with params: %s", query, params)
+        c = conn.execute(query, params)
+        if fetchone:
+            return c.fetchone()
+        if fetchall:
+            return c.fetchall()
+        conn.commit()
     except sqlite3.Error as e:
-        logging.error(f"Database error: {e}")
+        conn.rollback()
+        DB_QUERY_ERRORS.inc(statement_label(query))
+        db_log.error("Database error: %s", e, extra={"statement": statement_label(query)})
         return None
+    finally:
+        DB_QUERY_SECONDS.observe(time_module.perf_counter() - started, statement_label(query))
+
+# All database work runs on one dedicated thread so SQLite never blocks the event loop
+db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather-db")
+
+def timed_db_task(func, queued, *args, **kwargs):
+    """Run func on the database thread, recording its queue wait and run time."""
+    started = time_module.perf_counter()
+    DB_QUEUE_SECONDS.observe(started - queued)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        DB_TASK_SECONDS.observe(time_module.perf_counter() - started, func.__name__)
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database function on the database thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        db_executor, functools.partial(timed_db_task, func, time_module.perf_counter(), *args, **kwargs)
+    )
+
+async def db_execute_async(query, params=(), fetchone=False, fetchall=False):
+    """Awaitable db_execute for use inside commands, buttons and scheduled jobs."""
+    return await run_db(db_execute, query, params, fetchone=fetchone, fetchall=fetchall)
     
 # Archive weekly forecast
-def archive_weekly_forecast(server_id):
-    """Archive the current week's forecast for the server."""
-    today = datetime.now()
+# Archives copy the stored condition, temperature and components rather than re-parsing the text,
+# which only the simple style can be parsed from
+ARCHIVE_FIELDS = FORECAST_COLUMNS[3:]
+ARCHIVE_COLUMNS = "server_id, week_start_date, forecast_date, region, " + ", ".join(ARCHIVE_FIELDS)
+ARCHIVE_UPSERT = f'''
+    ON CONFLICT(server_id, forecast_date, region) DO UPDATE SET
+        week_start_date=excluded.week_start_date,
+        {", ".join(f"{column}=excluded.{column}" for column in ARCHIVE_FIELDS)}
+'''
+# Copy a week of stored forecasts for many servers (a JSON array of ids) in one statement
+ARCHIVE_WEEK_QUERY = f'''
+    INSERT INTO forecast_archive ({ARCHIVE_COLUMNS})
+    SELECT server_id, ?, forecast_date, region, {", ".join(ARCHIVE_FIELDS)}
+    FROM weather_forecast
+    WHERE server_id IN (SELECT value FROM json_each(?)) AND forecast_date BETWEEN ? AND ?
+''' + ARCHIVE_UPSERT
+# Archive one row; see archive_row
+ARCHIVE_ROW_QUERY = f'''
+    INSERT INTO forecast_archive ({ARCHIVE_COLUMNS})
+    VALUES ({", ".join("?" for _ in range(4 + len(ARCHIVE_FIELDS)))})
+''' + ARCHIVE_UPSERT
+
+def archive_row(server_id, week_start_date, forecast_date, region, forecast_text):
+    """ARCHIVE_ROW_QUERY parameters for a simple-style day (seeded or legacy), parsed from its text."""
+    return (server_id, week_start_date, forecast_date, region, forecast_text) + forecast_fields(forecast_text)
+
+def archive_weeks(server_ids, today=None):
+    """Archive the week containing ``today`` (default: the current week) for many servers.
+
+    Returns the number of archived days; archiving a week again replaces it.
+    """
+    today = today or datetime.now()
     # Find the most recent Monday (start of week)
     week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
     week_dates = [(week_start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
 
-    placeholders = ",".join("?" for _ in week_dates)
-    query = f'''
-        SELECT forecast_date, forecast_text
-        FROM weather_forecast
-        WHERE server_id=? AND forecast_date IN ({placeholders})
-        ORDER BY forecast_date
-    '''
-    result = db_execute(query, (server_id, *week_dates), fetchall=True)
-    if result:
-        # Store as a simple joined string (could use JSON for more structure)
-        forecasts = "\n".join([f"{row[0]}: {row[1]}" for row in result])
-        db_execute(
-            '''INSERT INTO weekly_forecast_archive (server_id, week_start_date, week_end_date, forecasts)
-               VALUES (?, ?, ?, ?)''',
-            (server_id, week_start.strftime("%Y-%m-%d"), week_end.strftime("%Y-%m-%d"), forecasts)
+    conn = db_manager.get()
+    with conn:
+        archived = conn.execute(
+            ARCHIVE_WEEK_QUERY, (week_dates[0], json.dumps(list(server_ids)), week_dates[0], week_dates[-1])
+        ).rowcount
+        if FORECAST_MODE == "seeded":
+            # Seeded days are never stored, so archive the days without an override from the seed
+            stored = set(conn.execute(
+                '''SELECT server_id, forecast_date FROM forecast_archive
+                   WHERE server_id IN (SELECT value FROM json_each(?)) AND week_start_date=? AND region=?''',
+                (json.dumps(list(server_ids)), week_dates[0], "coastal")
+            ).fetchall())
+            rows = [
+                archive_row(server_id, week_dates[0], date_str, "coastal",
+                            seeded_daily_forecast(get_forecast_seed(server_id, date_str), date_str, "coastal"))
+                for server_id in server_ids for date_str in week_dates
+                if (server_id, date_str) not in stored
+            ]
+            conn.executemany(ARCHIVE_ROW_QUERY, rows)
+            archived += len(rows)
+    db_log.info("Archived %d forecast days for %d servers (week of %s)", archived, len(server_ids), week_dates[0])
+    return archived
+
+def archive_weekly_forecast(server_id, today=None):
+    """Archive the week containing ``today`` (default: the current week) for the server."""
+    return archive_weeks([server_id], today) > 0
+
+def load_archived_week(server_id, week_start=None):
+    """Return (week_start_date, forecast_date, region, forecast_text) rows for one archived week.
+
+    Without week_start, the most recent week is used. Weeks that retention
+    has compressed are read back from their blob.
+    """
+    if week_start is None:
+        latest = db_execute(
+            '''SELECT MAX(week_start_date) FROM (
+                   SELECT MAX(week_start_date) AS week_start_date FROM forecast_archive WHERE server_id=?
+                   UNION ALL
+                   SELECT MAX(week_start_date) FROM forecast_archive_blob WHERE server_id=?)''',
+            (server_id, server_id), fetchone=True
         )
-        logging.info(f"Archived weekly forecast for server {server_id} ({week_start} - {week_end})")
-        return True
-    return False
+        week_start = latest[0] if latest else None
+        if week_start is None:
+            return []
+    rows = db_execute(
+        '''SELECT week_start_date, forecast_date, region, forecast_text
+           FROM forecast_archive
+           WHERE server_id=? AND week_start_date=?
+           ORDER BY forecast_date, region''',
+        (server_id, week_start), fetchall=True
+    )
+    if rows:
+        return rows
+    blob = db_execute(
+        '''SELECT forecasts FROM forecast_archive_blob WHERE server_id=? AND week_start_date=?''',
+        (server_id, week_start), fetchone=True
+    )
+    if not blob:
+        return []
+    return [(week_start, forecast_date, region, forecast_text) for forecast_date, region, forecast_text, *_ in unpack_week(blob[0])]
+
+# Retention: hot per-day rows -> compressed weekly blobs -> monthly climate summaries
+PURGE_TABLES = (
+    "weather_forecast", "forecast_archive", "forecast_archive_blob", "climate_rollup",
+    "server_settings", "guild_schedule", "post_ledger", "forecast_seed_history",
+)
+
+def pack_week(days):
+    """Compress a week's [forecast_date, region, *ARCHIVE_FIELDS] entries into a blob."""
+    return zlib.compress(json.dumps(sorted(days), separators=(",", ":")).encode(), 9)
+
+def unpack_week(blob):
+    """Return a blob's (forecast_date, region, *ARCHIVE_FIELDS) days.
+
+    Blobs packed before they carried the structured columns only hold
+    [forecast_date, region, forecast_text]; those are parsed from the text.
+    """
+    return [
+        tuple(day) if len(day) > 3 else tuple(day) + forecast_fields(day[2])
+        for day in json.loads(zlib.decompress(blob))
+    ]
+
+def mark_guild_departed(server_id):
+    """Remember that the bot left a guild; its data is purged after RETENTION_DEPARTED_DAYS."""
+    db_execute(
+        '''INSERT INTO departed_guilds (server_id, left_at) VALUES (?, ?)
+           ON CONFLICT(server_id) DO UPDATE SET left_at=excluded.left_at''',
+        (server_id, time_module.time())
+    )
+
+def clear_guild_departed(server_id):
+    db_execute('''DELETE FROM departed_guilds WHERE server_id=?''', (server_id,))
+
+def purge_departed_guilds(now=None):
+    """Delete every row belonging to guilds the bot left more than the grace period ago."""
+    cutoff = (now or time_module.time()) - RETENTION_DEPARTED_DAYS * 86400
+    conn = db_manager.get()
+    with conn:
+        server_ids = [
+            server_id for server_id, in conn.execute(
+                '''SELECT server_id FROM departed_guilds WHERE left_at < ?''', (cutoff,)
+            ).fetchall()
+        ]
+        ids = json.dumps(server_ids)
+        deleted = 0
+        for table in PURGE_TABLES:
+            deleted += conn.execute(
+                f"DELETE FROM {table} WHERE server_id IN (SELECT value FROM json_each(?))", (ids,)
+            ).rowcount
+        conn.execute('''DELETE FROM departed_guilds WHERE server_id IN (SELECT value FROM json_each(?))''', (ids,))
+    for server_id in server_ids:
+        forecast_cache.invalidate(server_id)
+        forecast_seeds.pop(server_id, None)
+    return len(server_ids), deleted
+
+def compress_old_weeks(today=None):
+    """Move per-day rows for weeks older than RETENTION_HOT_WEEKS into compressed weekly blobs."""
+    today = today or datetime.now()
+    cutoff = (today - timedelta(days=today.weekday(), weeks=RETENTION_HOT_WEEKS)).strftime("%Y-%m-%d")
+    conn = db_manager.get()
+    with conn:
+        # Anything never archived (e.g. a guild that stopped getting weekly runs) is archived first
+        conn.execute(
+            f'''INSERT INTO forecast_archive ({ARCHIVE_COLUMNS})
+                SELECT server_id, date(forecast_date, '-6 days', 'weekday 1'), forecast_date, region,
+                       {", ".join(ARCHIVE_FIELDS)}
+                FROM weather_forecast
+                WHERE forecast_date < ?
+                ON CONFLICT(server_id, forecast_date, region) DO NOTHING''',
+            (cutoff,)
+        )
+        expired = conn.execute(
+            '''DELETE FROM weather_forecast WHERE forecast_date < ? RETURNING server_id, forecast_date''', (cutoff,)
+        ).fetchall()
+
+        # Blobs keep every archived column, so the structured fields survive compression
+        weeks = {}
+        for server_id, week_start_date, forecast_date, region, *fields in conn.execute(
+            f'''SELECT server_id, week_start_date, forecast_date, region, {", ".join(ARCHIVE_FIELDS)}
+                FROM forecast_archive WHERE week_start_date < ?''',
+            (cutoff,)
+        ):
+            weeks.setdefault((server_id, week_start_date), {})[(forecast_date, region)] = fields
+        for (server_id, week_start_date), days in weeks.items():
+            # Merge with an earlier blob of the same week, letting the newer rows win
+            existing = conn.execute(
+                '''SELECT forecasts FROM forecast_archive_blob WHERE server_id=? AND week_start_date=?''',
+                (server_id, week_start_date)
+            ).fetchone()
+            merged = {(forecast_date, region): list(fields) for forecast_date, region, *fields in unpack_week(existing[0])} if existing else {}
+            merged.update(days)
+            conn.execute(
+                '''INSERT OR REPLACE INTO forecast_archive_blob (server_id, week_start_date, forecasts) VALUES (?, ?, ?)''',
+                (server_id, week_start_date, pack_week([[d, r, *fields] for (d, r), fields in merged.items()]))
+            )
+        compressed = conn.execute('''DELETE FROM forecast_archive WHERE week_start_date < ?''', (cutoff,)).rowcount
+    if expired:
+        forecast_cache.invalidate_days(set(expired))
+    return len(expired), compressed, len(weeks)
+
+def expire_old_weeks(today=None):
+    """Drop compressed weeks older than RETENTION_ROLLUP_MONTHS; climate_rollup already holds their days."""
+    today = today or datetime.now()
+    month_index = today.year * 12 + today.month - 1 - RETENTION_ROLLUP_MONTHS
+    cutoff = datetime(month_index // 12, month_index % 12 + 1, 1)
+    # Only whole weeks before the cutoff month, so !historic_forecast never shows half a week
+    last_week_start = (cutoff - timedelta(days=7)).strftime("%Y-%m-%d")
+    conn = db_manager.get()
+    with conn:
+        return conn.execute(
+            '''DELETE FROM forecast_archive_blob WHERE week_start_date <= ?''', (last_week_start,)
+        ).rowcount
+
+def database_size():
+    """Return (file_bytes, free_pages) for the database."""
+    conn = db_manager.get()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_size * page_count, free_pages
+
+def incremental_vacuum_step(pages):
+    """Return up to ``pages`` free pages to the OS; returns the free pages left."""
+    conn = db_manager.get()
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+async def run_retention():
+    """Run every retention tier, then vacuum in small steps so other database work can interleave."""
+    try:
+        started = time_module.perf_counter()
+        size_before, _ = await run_db(database_size)
+        departed, purged = await run_db(purge_departed_guilds)
+        expired, compressed, weeks = await run_db(compress_old_weeks)
+        dropped_weeks = await run_db(expire_old_weeks)
+        free_pages = (await run_db(database_size))[1]
+        while free_pages:
+            left = await run_db(incremental_vacuum_step, RETENTION_VACUUM_PAGES)
+            if left >= free_pages:
+                # Nothing reclaimed (incremental vacuum off, or writes freeing pages as fast); try again next run
+                jobs_log.warning("Incremental vacuum stopped with %d free pages left", left)
+                break
+            free_pages = left
+        size_after, _ = await run_db(database_size)
+        jobs_log.info(
+            "Retention: purged %d rows from %d departed guilds, expired %d forecasts, "
+            "compressed %d archive rows into %d weeks, dropped %d expired weeks; "
+            "reclaimed %d bytes (%d bytes now) in %.2fs",
+            purged, departed, expired, compressed, weeks, dropped_weeks,
+            size_before - size_after, size_after, time_module.perf_counter() - started
+        )
+        return size_before - size_after
+    except Exception as e:
+        jobs_log.error("Error in retention job: %s", e)
+        return 0
+
+async def retention_loop():
+    """Run retention every RETENTION_INTERVAL_HOURS."""
+    while True:
+        await run_retention()
+        await asyncio.sleep(RETENTION_INTERVAL_HOURS * 3600)
 
 # Check if the user is an admin
 def is_admin(ctx):
@@ -381,7 +1597,7 @@ async def archive_week(ctx):
     if not is_admin(ctx):
         await ctx.send("❌ You do not have permission to use this command.")
         return
-    success = archive_weekly_forecast(ctx.guild.id)
+    success = await run_db(archive_weekly_forecast, ctx.guild.id, guild_now(ctx.guild.id).replace(tzinfo=None))
     if success:
         await ctx.send("📦 This week's forecast has been archived.")
     else:
@@ -402,23 +1618,15 @@ async def historic_forecast(ctx, week_start: str = None):
         except ValueError:
             await ctx.send("❌ Please use the format YYYY-MM-DD for the week start date.")
             return
-        result = db_execute(
-            '''SELECT week_start_date, week_end_date, forecasts
-               FROM weekly_forecast_archive
-               WHERE server_id=? AND week_start_date=?
-               ORDER BY week_start_date DESC''',
-            (server_id, week_start), fetchone=True
+    rows = await run_db(load_archived_week, server_id, week_start)
+    if rows:
+        week_start = rows[0][0]
+        week_end = (datetime.strptime(week_start, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d")
+        forecasts = "\n".join(
+            f"{forecast_date}: {forecast_text}" if region == "coastal"
+            else f"{forecast_date} ({region}): {forecast_text}"
+            for _, forecast_date, region, forecast_text in rows
         )
-    else:
-        result = db_execute(
-            '''SELECT week_start_date, week_end_date, forecasts
-               FROM weekly_forecast_archive
-               WHERE server_id=?
-               ORDER BY week_start_date DESC LIMIT 1''',
-            (server_id,), fetchone=True
-        )
-    if result:
-        week_start, week_end, forecasts = result
         await ctx.send(
             f"📚 **Historic Forecast ({week_start} to {week_end})**\n\n{forecasts}"
         )
@@ -437,7 +1645,11 @@ async def set_weather_channel(ctx, channel: discord.TextChannel):
     if not is_admin(ctx):
         await ctx.send("❌ You do not have permission to use this command.")
         return
-    db_execute('''INSERT OR REPLACE INTO server_settings (server_id, weather_channel_id) VALUES (?, ?)''', (ctx.guild.id, channel.id))
+    await db_execute_async(
+        '''INSERT INTO server_settings (server_id, weather_channel_id) VALUES (?, ?)
+           ON CONFLICT(server_id) DO UPDATE SET weather_channel_id=excluded.weather_channel_id''',
+        (ctx.guild.id, channel.id)
+    )
     await ctx.send(f"🌊 Weather updates will be posted in {channel.mention}")
 
 @bot.command(name="show_weather_channel")
@@ -445,40 +1657,151 @@ async def show_weather_channel(ctx):
     if not is_admin(ctx):
         await ctx.send("❌ You do not have permission to use this command.")
         return
-    result = db_execute('''SELECT weather_channel_id FROM server_settings WHERE server_id=?''', (ctx.guild.id,), fetchone=True)
+    result = await db_execute_async('''SELECT weather_channel_id FROM server_settings WHERE server_id=?''', (ctx.guild.id,), fetchone=True)
     if result and (channel := bot.get_channel(result[0])):
         await ctx.send(f"📌 Current weather channel: {channel.mention}")
     else:
         await ctx.send("❌ No weather channel set! Use `!set_weather_channel`")
 
+@bot.command(name="set_weather_schedule")
+async def set_weather_schedule(ctx, timezone_name: str, post_time: str = "00:00"):
+    """Set the timezone and local time for daily posts (admin only)."""
+    if not is_admin(ctx):
+        await ctx.send("❌ You do not have permission to use this command.")
+        return
+    try:
+        tz = ZoneInfo(timezone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        await ctx.send("❌ Unknown timezone. Use an IANA name such as `Europe/London` or `America/Chicago`.")
+        return
+    try:
+        local_time = time.fromisoformat(post_time)
+    except ValueError:
+        await ctx.send("❌ Please use the format HH:MM for the posting time.")
+        return
+
+    await db_execute_async(
+        '''INSERT INTO guild_schedule (server_id, timezone, post_time) VALUES (?, ?, ?)
+           ON CONFLICT(server_id) DO UPDATE SET timezone=excluded.timezone, post_time=excluded.post_time''',
+        (ctx.guild.id, timezone_name, local_time.strftime("%H:%M"))
+    )
+    guild_schedules[ctx.guild.id] = (tz, local_time)
+    scheduler.add_guild(ctx.guild.id)
+    await ctx.send(f"🕛 Daily weather will be posted at {local_time.strftime('%H:%M')} ({timezone_name}).")
+
+@bot.command(name="show_weather_schedule")
+async def show_weather_schedule(ctx):
+    """Show the timezone and local time for daily posts."""
+    tz, post_time = get_guild_schedule(ctx.guild.id)
+    await ctx.send(f"🕛 Daily weather is posted at {post_time.strftime('%H:%M')} ({tz.key}).")
+
 @bot.command(name="generate_forecast")
-async def generate_forecast(ctx):
+async def generate_forecast(ctx, use_trends: bool = False):
     if not is_admin(ctx):
         await ctx.send("❌ You do not have permission to use this command.")
         return
 
     server_id = ctx.guild.id
-
-    # Archive the current week's forecast before generating a new one
-    archived = archive_weekly_forecast(server_id)
+    # Seeded guilds derive their days from the seed, so trends only shape stored forecasts
+    trend = None
+    if use_trends and FORECAST_MODE != "seeded":
+        trend = trend_weights(await run_db(get_weather_trends, server_id))
+
+    # Archive the current week's forecast before generating a new one; "current" is in the guild's timezone
+    today = guild_now(server_id).replace(tzinfo=None)
+    archived = await run_db(archive_weekly_forecast, server_id, today)
     if archived:
         await ctx.send("📦 Previous week's forecast has been archived.")
 
-    current_date = datetime.now()
-    season = "spring"  # You can determine the season based on the current date
+    await run_db(generate_weekly_forecast, server_id, today, reroll=True, trend=trend)
+    await ctx.send(f"📅 One-week forecast generated.{' Trends were used.' if trend else ''}")
 
-    for day in range(0, 7):  # <-- Start from 0 to include today
-        forecast_date = (current_date + timedelta(days=day)).strftime("%Y-%m-%d")
-        forecast_text = generate_daily_forecast(season, "coastal")
+@bot.command(name="climate")
+async def climate(ctx, period: str = None):
+    """Show climate statistics for a month (YYYY-MM, default this month) or a year (YYYY)."""
+    period = period or guild_now(ctx.guild.id).strftime("%Y-%m")
+    try:
+        if len(period) == 4:
+            datetime.strptime(period, "%Y")
+            first_period, last_period = f"{period}-01", f"{period}-12"
+        else:
+            datetime.strptime(period, "%Y-%m")
+            first_period = last_period = period
+    except ValueError:
+        await ctx.send("❌ Please use the format YYYY-MM for a month or YYYY for a year.")
+        return
 
-        db_execute(
-            '''INSERT INTO weather_forecast (server_id, forecast_date, forecast_text) VALUES (?, ?, ?)''',
-            (server_id, forecast_date, forecast_text)
-        )
+    stats = await run_db(get_climate_stats, ctx.guild.id, first_period, last_period)
+    if not stats:
+        await ctx.send(f"⚠️ No forecasts recorded for {period}.")
+        return
+    lines = [f"📊 **Climate for {period}:**"]
+    for region, region_stats in sorted(stats.items()):
+        line = f"- **{region.capitalize()} Region:** {region_stats['days']} days"
+        if region_stats["temp_days"]:
+            average = region_stats["temp_sum"] / region_stats["temp_days"]
+            line += f", avg {average:.0f}°F ({region_stats['min_temp']}–{region_stats['max_temp']}°F)"
+        line += f", {region_stats['precip_days']} days of precipitation"
+        ranked = sorted(region_stats["conditions"].items(), key=lambda item: item[1], reverse=True)
+        line += "\n  " + ", ".join(f"{condition.capitalize()} {days}" for condition, days in ranked)
+        lines.append(line)
+    await ctx.send("\n".join(lines))
+
+@bot.command(name="weather_trends")
+async def weather_trends(ctx, days: int = 7):
+    """Show the most common conditions per region over the last N days."""
+    days = max(1, min(days, TREND_MAX_DAYS))
+    trends = await run_db(get_weather_trends, ctx.guild.id, days)
+    if not trends:
+        await ctx.send("⚠️ No historical data available.")
+        return
+    lines = [f"🌤️ **Weather Trends (Last {days} Days):**"]
+    for region, counts in sorted(trends.items()):
+        total = sum(counts.values())
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        summary = ", ".join(f"{condition.capitalize()} ({count / total:.0%})" for condition, count in ranked)
+        lines.append(f"- **{region.capitalize()} Region:** {summary}")
+    await ctx.send("\n".join(lines))
+
+@bot.command(name="weather_search")
+async def weather_search(ctx, search_filter: str = None, value: str = None):
+    """Find stored days by temperature or weather component, e.g. `freezing` or `magical wild_magic`."""
+    search_filter = (search_filter or "").lower()
+    value = (value or "").lower()
+    usage = (
+        "❌ Usage: `!weather_search freezing|hot` or `!weather_search precipitation|special|magical <value>`.\n"
+        + "\n".join(f"- **{field}:** {', '.join(values)}" for field, values in SEARCHABLE_COMPONENTS.items())
+    )
+    if search_filter not in SEARCH_TEMPERATURE_FILTERS and value not in SEARCHABLE_COMPONENTS.get(search_filter, ()):
+        await ctx.send(usage)
+        return
 
-        logging.info(f"Generated forecast for server {server_id} on {forecast_date}: {forecast_text}")
+    rows = await run_db(search_forecasts, ctx.guild.id, search_filter, value)
+    label = search_filter if search_filter in SEARCH_TEMPERATURE_FILTERS else value.replace("_", " ")
+    if not rows:
+        await ctx.send(f"⚠️ No stored {label} days found.")
+        return
+    lines = [f"🔎 **Latest {label} days:**"]
+    for forecast_date, region, forecast_text in rows:
+        lines.append(f"- {forecast_date} ({region.capitalize()}): {forecast_text}")
+    await ctx.send("\n".join(lines))
+
+@bot.command(name="set_forecast")
+async def set_forecast(ctx, date: str, *, forecast_text: str):
+    """Override the forecast for a specific date (admin only)."""
+    if not is_admin(ctx):
+        await ctx.send("❌ You do not have permission to use this command.")
+        return
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        await ctx.send("❌ Please use the format YYYY-MM-DD for the date.")
+        return
 
-    await ctx.send("📅 One-week forecast generated.")
+    server_id = ctx.guild.id
+    await run_db(set_forecast_override, server_id, date, forecast_text)
+    commands_log.info("Forecast override for server %s on %s: %s", server_id, date, forecast_text)
+    await ctx.send(f"✏️ Forecast for {date} set to: {forecast_text}")
 
 def format_golarion_date(date_obj: datetime) -> str:
     """Return a lore-friendly Golarion date string like 'Oathday, Pharast 10'."""
@@ -493,6 +1816,14 @@ def format_golarion_date(date_obj: datetime) -> str:
     month = golarion_months[date_obj.month - 1]
     return f"{weekday}, {month} {date_obj.day}"
 
+def format_forecast_week(rows):
+    """Format (forecast_date, forecast_text) rows as the 7-day forecast message."""
+    forecast_lines = [
+        f"📅 **{format_golarion_date(datetime.strptime(row[0], '%Y-%m-%d'))}**\n{row[1]}"
+        for row in rows
+    ]
+    return f"🌤 **7-Day Forecast**:\n\n" + "\n\n".join(forecast_lines)
+
 @bot.command(name="view_forecast")
 async def view_forecast(ctx, *, date: str = None):
     """View the 7-day forecast starting from today or a specific date."""
@@ -505,32 +1836,20 @@ async def view_forecast(ctx, *, date: str = None):
             await ctx.send("❌ Please use the format YYYY-MM-DD for the date.")
             return
     else:
-        start_date = datetime.now()
+        start_date = guild_now(server_id)
 
     date_list = [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
 
     # Debug logging - check what dates we're querying
-    logging.info(f"Querying forecast for dates: {date_list}")
+    commands_log.debug("Querying forecast for dates: %s", date_list)
 
-    # Use DISTINCT to ensure we only get one entry per date
-    placeholders = ",".join("?" for _ in date_list)
-    query = f'''
-        SELECT DISTINCT forecast_date, forecast_text
-        FROM weather_forecast
-        WHERE server_id=? AND forecast_date IN ({placeholders})
-        ORDER BY forecast_date
-    '''
-    result = db_execute(query, (server_id, *date_list), fetchall=True)
+    result = await fetch_forecasts(server_id, date_list)
 
     # Debug logging - check how many results we got
-    logging.info(f"Retrieved {len(result) if result else 0} forecast entries")
+    commands_log.debug("Retrieved %d forecast entries", len(result) if result else 0)
 
     if result:
-        forecast_lines = [
-            f"📅 **{format_golarion_date(datetime.strptime(row[0], '%Y-%m-%d'))}**\n{row[1]}"
-            for row in result
-        ]
-        await ctx.send(f"🌤 **7-Day Forecast**:\n\n" + "\n\n".join(forecast_lines))
+        await ctx.send(format_forecast_week(result))
     else:
         await ctx.send("⚠️ No forecast data found for the upcoming 7 days.")
 
@@ -545,7 +1864,7 @@ async def post_weather(ctx):
     server_id = ctx.guild.id
     
     # Get the configured weather channel
-    result = db_execute(
+    result = await db_execute_async(
         '''SELECT weather_channel_id FROM server_settings WHERE server_id=?''',
         (server_id,), fetchone=True
     )
@@ -561,37 +1880,19 @@ async def post_weather(ctx):
         await ctx.send(f"❌ Could not find the configured weather channel. Please use `!set_weather_channel` to set a new one.")
         return
     
-    # Get current time in Central timezone
-    central = pytz.timezone("US/Central")
-    now = datetime.now(central)
+    # Get current time in the guild's timezone
+    now = guild_now(server_id)
     today_date = now.strftime("%Y-%m-%d")
     
     # Get Golarion day name for today
     golarion_day = GOLARION_DAYS[now.weekday()]
     
     # Get today's forecast
-    forecast = db_execute(
-        '''SELECT forecast_text FROM weather_forecast 
-           WHERE server_id=? AND forecast_date=?''',
-        (server_id, today_date), fetchone=True
-    )
+    coastal_forecast, forest_forecast = await run_db(get_daily_report_forecasts, server_id, today_date)
     
     try:
-        if forecast:
-            # Parse the forecast text to get weather type and temperature
-            # This assumes forecast_text is in format like "stormy and 75°F"
-            coastal_forecast = forecast[0]
-            
-            # Generate a different forecast for the forest region
-            # Slightly modify the original forecast for variety
-            forest_forecast = generate_daily_forecast("spring", "forest")
-            
-            # Format the message according to the preferred template
-            weather_message = f"\n**Daily Weather Report ({golarion_day})** \n"
-            weather_message += f"• Coastal Region: {coastal_forecast} \n"
-            weather_message += f"• Fiereni Forest: {forest_forecast} \n"
-            weather_message += "*May the winds favor your travels!*"
-            
+        if coastal_forecast:
+            weather_message = format_daily_report(golarion_day, coastal_forecast, forest_forecast)
             await channel.send(weather_message)
             await ctx.send(f"✅ Weather update for today has been posted to {channel.mention}")
         else:
@@ -600,7 +1901,7 @@ async def post_weather(ctx):
         await ctx.send(f"❌ Missing permissions to post in {channel.mention}.")
     except Exception as e:
         await ctx.send(f"❌ Error posting forecast: {str(e)}")
-        logging.error(f"Failed to manually post forecast: {e}")
+        commands_log.error("Failed to manually post forecast: %s", e)
 
 @bot.command(name="set_weather_reader_role")
 async def set_weather_reader_role(ctx, role: discord.Role):
@@ -620,26 +1921,19 @@ async def view_weather_reader_role(ctx):
 async def read_weather(ctx):
     """Read today's and tomorrow's weather."""
     server_id = ctx.guild.id
-    now = datetime.now()
+    now = guild_now(server_id)
     
     # Get today and tomorrow's dates
     today = now.strftime("%Y-%m-%d")
     tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
     
     # Debug logging
-    logging.info(f"Reading weather for today ({today}) and tomorrow ({tomorrow})")
+    commands_log.debug("Reading weather for today (%s) and tomorrow (%s)", today, tomorrow)
     
-    # Use DISTINCT to ensure we only get one entry per date
-    query = '''
-        SELECT DISTINCT forecast_date, forecast_text
-        FROM weather_forecast
-        WHERE server_id=? AND forecast_date IN (?, ?)
-        ORDER BY forecast_date
-    '''
-    result = db_execute(query, (server_id, today, tomorrow), fetchall=True)
+    result = await fetch_forecasts(server_id, [today, tomorrow])
     
     # Debug logging
-    logging.info(f"Retrieved {len(result) if result else 0} weather entries")
+    commands_log.debug("Retrieved %d weather entries", len(result) if result else 0)
 
     if result:
         forecast_lines = [
@@ -661,142 +1955,502 @@ async def cleanup_database(ctx):
     server_id = ctx.guild.id
     
     # Get count before cleanup
-    count_before = db_execute(
+    count_before = (await db_execute_async(
         '''SELECT COUNT(*) FROM weather_forecast WHERE server_id=?''', 
         (server_id,), fetchone=True
-    )[0]
+    ))[0]
     
-    # Delete duplicate entries, keeping only one entry per server_id and forecast_date
+    # Delete duplicate entries, keeping the newest per server_id, forecast_date and region like the index migration
     cleanup_query = '''
     DELETE FROM weather_forecast 
     WHERE id NOT IN (
-        SELECT MIN(id) 
+        SELECT MAX(id) 
         FROM weather_forecast 
         WHERE server_id = ?
-        GROUP BY server_id, forecast_date
+        GROUP BY server_id, forecast_date, region
     ) AND server_id = ?
     '''
     
-    db_execute(cleanup_query, (server_id, server_id))
+    await db_execute_async(cleanup_query, (server_id, server_id))
+    forecast_cache.invalidate(server_id)
     
     # Get count after cleanup
-    count_after = db_execute(
+    count_after = (await db_execute_async(
         '''SELECT COUNT(*) FROM weather_forecast WHERE server_id=?''', 
         (server_id,), fetchone=True
-    )[0]
+    ))[0]
     
     removed = count_before - count_after
     await ctx.send(f"🧹 Database cleanup complete. Removed {removed} duplicate entries.")
-    logging.info(f"Database cleanup for server {server_id}: removed {removed} duplicates")
+    commands_log.info("Database cleanup for server %s: removed %d duplicates", server_id, removed)
+
+@bot.command(name="cache_stats")
+async def cache_stats(ctx):
+    """Show forecast cache hit/miss counters (admin only)."""
+    if not is_admin(ctx):
+        await ctx.send("❌ You do not have permission to use this command.")
+        return
+    stats = forecast_cache.stats()
+    await ctx.send(
+        f"🗃️ **Forecast Cache**: {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.1%} hit rate), {stats['size']}/{stats['maxsize']} entries"
+    )
+
+@bot.command(name="shard_stats")
+async def shard_stats(ctx):
+    """Show per-shard latency, guild counts and scheduled job timings (admin only)."""
+    if not is_admin(ctx):
+        await ctx.send("❌ You do not have permission to use this command.")
+        return
+    guild_counts = {}
+    for guild in bot.guilds:
+        guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+    lines = [f"🧩 **Shards** (this process runs {len(bot.shards)} of {bot.shard_count}):"]
+    for shard_id, latency in sorted(bot.latencies):
+        lines.append(f"• Shard {shard_id}: {guild_counts.get(shard_id, 0)} guilds, {latency * 1000:.0f} ms latency")
+        for name, stats in sorted(scheduler.job_stats(shard_id).items()):
+            lines.append(
+                f"  ◦ {name}: {stats['runs']} runs, last {stats['last']:.2f}s "
+                f"for {stats['guilds']} guilds, max {stats['max']:.2f}s"
+            )
+    await ctx.send("\n".join(lines))
+
+@bot.command(name="stats")
+async def stats(ctx):
+    """Show handler, database, job and Discord send metrics (admin only)."""
+    if not is_admin(ctx):
+        await ctx.send("❌ You do not have permission to use this command.")
+        return
+    uptime = timedelta(seconds=int(time_module.time() - METRICS_STARTED))
+    lines = [f"📈 **Bot Stats** (up {uptime}):"]
+
+    handlers = HANDLER_SECONDS.summary()
+    calls = {}
+    for (_, name, status), (count, _, p95) in handlers.items():
+        entry = calls.setdefault(name, [0, 0, 0.0])
+        entry[0] += count
+        entry[1] += count if status == "error" else 0
+        entry[2] = max(entry[2], p95 or 0.0)
+    lines.append(f"**Handlers:** {sum(c[0] for c in calls.values())} calls, {sum(c[1] for c in calls.values())} errors")
+    for name, (count, errors, p95) in sorted(calls.items(), key=lambda item: item[1][0], reverse=True)[:5]:
+        lines.append(f"• {name}: {count} calls, p95 {p95 * 1000:.0f} ms{f', {errors} errors' if errors else ''}")
+
+    queries = DB_QUERY_SECONDS.summary()
+    queue_wait = DB_QUEUE_SECONDS.summary().get((), (0, 0.0, None))
+    lines.append(
+        f"**Database:** {sum(count for count, _, _ in queries.values())} queries, "
+        f"{sum(DB_QUERY_ERRORS.values().values())} errors, queue wait p95 {(queue_wait[2] or 0) * 1000:.1f} ms"
+    )
+    for (statement,), (count, total, p95) in sorted(queries.items(), key=lambda item: item[1][1], reverse=True)[:5]:
+        lines.append(f"• {statement}: {count}×, {total:.2f}s total, p95 {p95 * 1000:.1f} ms")
+
+    jobs = JOB_SECONDS.summary()
+    if jobs:
+        lines.append("**Jobs:**")
+        for (name, shard), (count, total, _) in sorted(jobs.items(), key=str):
+            lines.append(f"• {name} (shard {shard}): {count} runs, avg {total / count:.2f}s")
+    generation_rate = GENERATION_RATE.values().get(())
+    lines.append(
+        f"**Generation:** {FORECASTS_WRITTEN.values().get((), 0)} forecasts written"
+        + (f", last fleet run {generation_rate:.0f} guilds/s" if generation_rate else "")
+    )
+
+    sends = DISCORD_SEND_SECONDS.summary().get(("daily_post",), (0, 0.0, None))
+    send_errors = sum(DISCORD_SEND_ERRORS.values().values())
+    rate_limits = sum(DISCORD_RATE_LIMITS.values().values())
+    global_rate_limits = DISCORD_GLOBAL_RATE_LIMITS.values().get((), 0)
+    lines.append(
+        f"**Discord:** {sends[0]} daily posts sent, p95 {(sends[2] or 0) * 1000:.0f} ms, "
+        f"{send_errors} failed, {rate_limits} rate limits ({global_rate_limits} global)"
+    )
+    await ctx.send("\n".join(lines))
 
 @bot.command(name="ping") # Simple ping command to ensure bot is responsive.
 async def ping(ctx):
     await ctx.send("🏓 Pong!")
 
 # Daily weather posting task
-@tasks.loop(minutes=15)
-async def post_daily_weather():
+# Shared by every shard's post so concurrent shards stay within one send budget
+post_semaphore = asyncio.Semaphore(POST_CONCURRENCY)
+
+async def send_daily_report(semaphore, guild, channel, weather_message):
+    """Send one guild's daily report, bounded by the shared semaphore; returns True on success."""
+    async with semaphore:
+        started = time_module.perf_counter()
+        try:
+            await channel.send(weather_message)
+            DISCORD_SEND_SECONDS.observe(time_module.perf_counter() - started, "daily_post")
+            posts_log.debug("Posted weather for %s", guild.name, extra={"guild_id": guild.id})
+            return True
+        except discord.errors.Forbidden:
+            DISCORD_SEND_ERRORS.inc("daily_post", 403)
+            posts_log.error(
+                "Missing permissions to post in channel %s in guild %s", channel.name, guild.name,
+                extra={"guild_id": guild.id}
+            )
+        except Exception as e:
+            DISCORD_SEND_ERRORS.inc("daily_post", getattr(e, "status", "error"))
+            posts_log.error("Failed to post forecast to %s: %s", guild.name, e, extra={"guild_id": guild.id})
+        return False
+
+async def send_ledgered_report(semaphore, server_id, post_date, guild, channel, weather_message):
+    """Send one daily report and record its ledger outcome straight away; returns (server_id, post_date, status).
+
+    Recording per send means a crash mid fan-out leaves only the sends that
+    were in flight pending, not every guild in the batch.
+    """
+    sent = await send_daily_report(semaphore, guild, channel, weather_message)
+    outcome = (server_id, post_date, "sent" if sent else "failed")
+    await run_db(record_posts, [outcome], "daily_post")
+    return outcome
+
+async def post_daily_weather(entries):
+    """Post the daily report for every (guild_id, fire_time) the scheduler found due."""
     try:
-        # Get current time in Central timezone
-        central = pytz.timezone("US/Central")
-        now = datetime.now(central)
-        logging.info(f"Current time: {now}")
-
-        # Check if it's between midnight and 15 minutes after
-        # This ensures we don't miss the window between function calls
-        if now.hour == 0 and now.minute < 15:
-            logging.info("Midnight window detected - posting daily weather")
-            
+        # Group guilds by their local date so each date needs just two bulk queries
+        by_date = {}
+        for guild_id, fire_time in entries:
+            local_now = fire_time.astimezone(get_guild_schedule(guild_id)[0])
+            by_date.setdefault(local_now.date(), []).append(guild_id)
+
+        sends = []
+        outcomes = []
+        skipped = 0
+        for local_date, guild_ids in by_date.items():
             # Format today's date in SQL format
-            today_date = now.strftime("%Y-%m-%d")
+            today_date = local_date.strftime("%Y-%m-%d")
             
             # Get Golarion day name for today
-            golarion_day = GOLARION_DAYS[now.weekday()]
+            golarion_day = GOLARION_DAYS[local_date.weekday()]
             
-            for guild in bot.guilds:
-                result = db_execute(
-                    '''SELECT weather_channel_id FROM server_settings WHERE server_id=?''',
-                    (guild.id,), fetchone=True
-                )
-                if not result:
-                    logging.info(f"No weather channel configured for guild {guild.id}")
-                    continue
-                    
-                channel_id = result[0]
-                channel = bot.get_channel(channel_id)                
+            # Claim the day's slot first so a restart or overlapping run never posts twice
+            guilds = {guild_id: bot.get_guild(guild_id) for guild_id in guild_ids}
+            guilds = {guild_id: guild for guild_id, guild in guilds.items() if guild}
+            claimed = await run_db(claim_posts, list(guilds), today_date, "daily_post")
+
+            # Load every channel and today's forecasts in two queries, then send concurrently
+            targets = await run_db(load_daily_post_targets, claimed, today_date)
+            skipped += len(claimed) - len(targets)
+            outcomes.extend((server_id, today_date, "skipped") for server_id in claimed if server_id not in targets)
+            for server_id, (channel_id, coastal_forecast, forest_forecast) in targets.items():
+                guild = guilds[server_id]
+                channel = bot.get_channel(channel_id)
                 if not channel:
-                    logging.warning(f"Could not find channel with ID {channel_id} for guild {guild.id}")
+                    posts_log.warning("Could not find channel with ID %s for guild %s", channel_id, guild.id)
+                    outcomes.append((server_id, today_date, "failed"))
                     continue
-                
-                # Get today's forecast using the explicit date
-                forecast = db_execute(
-                    '''SELECT forecast_text FROM weather_forecast 
-                       WHERE server_id=? AND forecast_date=?''',
-                    (guild.id, today_date), fetchone=True
-                )
-                
-                try:
-                    if forecast:
-                        # Parse the forecast text
-                        coastal_forecast = forecast[0]
-                        
-                        # Generate a different forecast for the forest region
-                        forest_forecast = generate_daily_forecast("spring", "forest")
-                        
-                        # Format the message according to the preferred template
-                        weather_message = f"\n**Daily Weather Report ({golarion_day})** \n"
-                        weather_message += f"• Coastal Region: {coastal_forecast} \n"
-                        weather_message += f"• Fiereni Forest: {forest_forecast} \n"
-                        weather_message += "*May the winds favor your travels!*"
-                        
-                        await channel.send(weather_message)
-                        logging.info(f"Posted weather for {guild.name}")
-                    else:
-                        await channel.send(f"\n**Daily Weather Report ({golarion_day})** \n⚠️ No forecast available.")
-                        logging.warning(f"No forecast found for guild {guild.id} on {today_date}")
-                except discord.errors.Forbidden:
-                    logging.error(f"Missing permissions to post in channel {channel.name} in guild {guild.name}")
-                except Exception as e:
-                    logging.error(f"Failed to post forecast to {guild.name}: {e}")
+                if coastal_forecast:
+                    weather_message = format_daily_report(golarion_day, coastal_forecast, forest_forecast)
+                else:
+                    weather_message = f"\n**Daily Weather Report ({golarion_day})** \n⚠️ No forecast available."
+                    posts_log.warning("No forecast found for guild %s on %s", guild.id, today_date)
+                sends.append(send_ledgered_report(post_semaphore, server_id, today_date, guild, channel, weather_message))
+
+        # Guilds that get no send are settled before the fan-out; each send records its own outcome
+        await run_db(record_posts, outcomes, "daily_post")
+        started = time_module.perf_counter()
+        results = await asyncio.gather(*sends)
+        posts_log.info(
+            "Posted daily weather to %d/%d channels (%d guilds without a channel) in %.2fs",
+            sum(status == 'sent' for _, _, status in results), len(sends), skipped,
+            time_module.perf_counter() - started
+        )
     except Exception as e:
-        logging.error(f"Error in post_daily_weather task: {e}")
+        posts_log.error("Error in post_daily_weather task: %s", e)
         # Don't let the task die - it will continue with the next scheduled run
 
-@tasks.loop(minutes=15)
-async def auto_generate_weekly_forecast():
+async def auto_generate_weekly_forecast(entries):
+    """Archive and regenerate the week for every (guild_id, fire_time) due at local Monday midnight."""
     try:
-        central = pytz.timezone("US/Central")
-        now = datetime.now(central)
-        # Only run once between midnight and 15 minutes after, and only on Monday
-        if now.weekday() == 0 and now.hour == 0 and now.minute < 15:
-            logging.info("Monday detected - auto-generating weekly forecasts")
-            for guild in bot.guilds:
-                server_id = guild.id
-                # Archive the previous week
-                archived = archive_weekly_forecast(server_id)
-                if archived:
-                    logging.info(f"Auto-archived previous week's forecast for server {server_id}")
-                # Generate new forecast for the week
-                season = "spring"  # You can make this dynamic if needed
-                for day in range(0, 7):
-                    forecast_date = (now + timedelta(days=day)).strftime("%Y-%m-%d")
-                    forecast_text = generate_daily_forecast(season, "coastal")
-                    db_execute(
-                        '''INSERT INTO weather_forecast (server_id, forecast_date, forecast_text) VALUES (?, ?, ?)''',
-                        (server_id, forecast_date, forecast_text)
-                    )
-                    logging.info(f"Auto-generated forecast for server {server_id} on {forecast_date}: {forecast_text}")
+        by_date = {}
+        for guild_id, fire_time in entries:
+            local_now = fire_time.astimezone(get_guild_schedule(guild_id)[0])
+            by_date.setdefault(local_now.date(), []).append(guild_id)
+
+        for local_date, server_ids in by_date.items():
+            start_date = datetime.combine(local_date, time(0, 0))
+            date_str = local_date.strftime("%Y-%m-%d")
+            # A week is archived and generated once; a rerun would overwrite forecasts already posted
+            claimed = await run_db(claim_posts, server_ids, date_str, "weekly_generate")
+            try:
+                # Archive the previous weeks and generate the new ones (seeded guilds derive them on demand)
+                archived = await run_db(archive_fleet, claimed, start_date)
+                written, elapsed, failed = (0, 0.0, [])
+                if FORECAST_MODE != "seeded" and claimed:
+                    written, elapsed, failed = await generate_fleet(claimed, start_date)
+            except Exception:
+                await run_db(record_posts, [(server_id, date_str, "failed") for server_id in claimed], "weekly_generate")
+                raise
+            # Only guilds whose rows committed are done; failed ones are retried by the startup catch-up
+            failed = set(failed)
+            await run_db(
+                record_posts,
+                [(server_id, date_str, "failed" if server_id in failed else "sent") for server_id in claimed],
+                "weekly_generate"
+            )
+            jobs_log.info(
+                "Auto-generated weekly forecasts for %d/%d servers (%d failed): %d days archived, %d rows written in %.2fs",
+                len(claimed) - len(failed), len(server_ids), len(failed), archived, written, elapsed
+            )
+
+        # Ledger rows older than the catch-up horizon are no longer needed
+        horizon = (datetime.now() - timedelta(days=14)).strftime("%Y-%m-%d")
+        pruned = await run_db(prune_post_ledger, horizon)
+        jobs_log.info("Pruned %d post ledger rows before %s", pruned, horizon)
+    except Exception as e:
+        jobs_log.error("Error in auto_generate_weekly_forecast task: %s", e)
+
+async def catch_up_missed_posts():
+    """Make up scheduled runs missed while the bot was down, using the post ledger to skip finished ones."""
+    now = datetime.now(timezone.utc)
+    guild_ids = [guild.id for guild in bot.guilds]
+    try:
+        # Weekly generation first: the daily posts need its forecasts
+        weekly = []
+        for guild_id in guild_ids:
+            fire_time = previous_weekly_generation(guild_id, now)
+            weekly.append((guild_id, fire_time, fire_time.date().strftime("%Y-%m-%d")))
+        caught_up = await run_db(find_catch_up_entries, weekly, "weekly_generate")
+        if caught_up:
+            jobs_log.info("Catching up weekly generation for %d servers", len(caught_up))
+            await scheduler.dispatch("weekly_generate", caught_up)
+
+        window = timedelta(hours=POST_CATCHUP_HOURS)
+        daily = []
+        for guild_id in guild_ids:
+            fire_time = previous_daily_post(guild_id, now)
+            if now - fire_time <= window:
+                daily.append((guild_id, fire_time, fire_time.date().strftime("%Y-%m-%d")))
+        caught_up = await run_db(find_catch_up_entries, daily, "daily_post")
+        if caught_up:
+            jobs_log.info("Catching up daily posts for %d servers", len(caught_up))
+            await scheduler.dispatch("daily_post", caught_up)
+
+        # Runs a previous process claimed but never finished can't be reclaimed until their claim goes stale
+        await retry_stale_claims("weekly_generate", weekly)
+        await retry_stale_claims("daily_post", daily)
     except Exception as e:
-        logging.error(f"Error in auto_generate_weekly_forecast task: {e}")
+        jobs_log.error("Error catching up missed posts: %s", e)
+
+async def retry_stale_claims(job, runs):
+    """Wait until pending claims among (guild_id, fire_time, post_date) runs go stale, then run those guilds again.
+
+    claim_posts only retakes a pending claim after POST_CLAIM_TIMEOUT, so
+    without this a restart inside the timeout would drop the unsent runs.
+    """
+    pending = await run_db(find_pending_claims, runs, job)
+    if not pending:
+        return
+    wait = max(pending.values()) + POST_CLAIM_TIMEOUT - time_module.time()
+    jobs_log.info("Retrying %d pending %s claims in %.0fs", len(pending), job, max(0.0, wait))
+    await asyncio.sleep(max(0.0, wait) + 1)
+    await scheduler.dispatch(job, [(guild_id, fire_time) for guild_id, fire_time, _ in runs if guild_id in pending])
+
+def next_local_time(after, tz, at=DEFAULT_POST_TIME, weekday=None):
+    """Return the first moment strictly after ``after`` that is ``at`` local time in tz (on ``weekday``, if given)."""
+    candidate_date = after.astimezone(tz).date()
+    while True:
+        candidate = datetime.combine(candidate_date, at, tzinfo=tz)
+        if candidate > after and (weekday is None or candidate_date.weekday() == weekday):
+            return candidate
+        candidate_date += timedelta(days=1)
+
+def previous_local_time(before, tz, at=DEFAULT_POST_TIME, weekday=None):
+    """Return the last moment at or before ``before`` that is ``at`` local time in tz (on ``weekday``, if given)."""
+    candidate_date = before.astimezone(tz).date()
+    while True:
+        candidate = datetime.combine(candidate_date, at, tzinfo=tz)
+        if candidate <= before and (weekday is None or candidate_date.weekday() == weekday):
+            return candidate
+        candidate_date -= timedelta(days=1)
+
+def previous_daily_post(guild_id, before):
+    tz, post_time = get_guild_schedule(guild_id)
+    return previous_local_time(before, tz, post_time)
+
+def previous_weekly_generation(guild_id, before):
+    tz, _ = get_guild_schedule(guild_id)
+    return previous_local_time(before, tz, weekday=0)
+
+def next_daily_post(guild_id, after):
+    tz, post_time = get_guild_schedule(guild_id)
+    return next_local_time(after, tz, post_time)
+
+def next_weekly_generation(guild_id, after):
+    tz, _ = get_guild_schedule(guild_id)
+    return next_local_time(after, tz, weekday=0)
+
+# Scheduler for the recurring per-guild jobs
+class JobScheduler:
+    """Sleep until the next due job instead of polling.
+
+    Pending runs live in a min-heap of (fire_time, priority, seq, guild_id,
+    job, generation) entries, so adding or rescheduling a guild costs
+    O(log n). When the head comes due, every due entry is popped and handed
+    to its job as one batch of (guild_id, fire_time) pairs, then each
+    guild's next occurrence is pushed. Runs that come due late (after a slow
+    iteration, a reconnect or a suspended host) still fire once, while runs
+    more than ``missed_grace`` overdue are logged as missed and skipped.
+
+    Batches are split by ``partition(guild_id)`` (the guild's shard) and the
+    partitions of one job run concurrently, each timed separately.
+    """
+
+    def __init__(self, partition=lambda guild_id: None, missed_grace=timedelta(hours=1), max_sleep=3600):
+        self.partition = partition
+        self.missed_grace = missed_grace
+        self.max_sleep = max_sleep  # Re-check the wall clock at least this often
+        self._heap = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._generations = {}  # guild_id -> generation; stale heap entries are skipped
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stats = {}  # (job, partition) -> run counters and durations
+
+    def add_job(self, name, handler, next_fire, priority=0):
+        """Register a per-guild job; next_fire(guild_id, after) returns the guild's next fire time."""
+        self._jobs[name] = (handler, next_fire, priority)
+
+    def add_guild(self, guild_id):
+        """Schedule every job for a guild, replacing anything already scheduled for it."""
+        generation = self._generations.get(guild_id, 0) + 1
+        self._generations[guild_id] = generation
+        now = datetime.now(timezone.utc)
+        for name, (_, next_fire, _) in self._jobs.items():
+            self._push(name, guild_id, next_fire(guild_id, now), generation)
+        self._wakeup.set()
+
+    def remove_guild(self, guild_id):
+        """Forget a guild; its heap entries are dropped lazily when they surface."""
+        self._generations.pop(guild_id, None)
+
+    def _push(self, name, guild_id, fire_time, generation):
+        _, _, priority = self._jobs[name]
+        heapq.heappush(self._heap, (fire_time, priority, next(self._seq), guild_id, name, generation))
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                await self._wait(None)
+                continue
+            now = datetime.now(timezone.utc)
+            delay = (self._heap[0][0] - now).total_seconds()
+            if delay > 0:
+                # Woken early by a new guild, or sleep capped by max_sleep: re-evaluate the head
+                await self._wait(min(delay, self.max_sleep))
+                continue
+
+            # Pop everything that is due; heap order runs lower priorities first at equal times
+            batches = {}
+            while self._heap and self._heap[0][0] <= now:
+                fire_time, _, _, guild_id, name, generation = heapq.heappop(self._heap)
+                if self._generations.get(guild_id) != generation:
+                    continue
+                handler, next_fire, _ = self._jobs[name]
+                lateness = (now - fire_time).total_seconds()
+                if lateness > self.missed_grace.total_seconds():
+                    JOB_SKIPPED.inc(name)
+                    jobs_log.warning("Skipping missed %s run for guild %s due at %s", name, guild_id, fire_time)
+                else:
+                    JOB_LATENESS_SECONDS.observe(lateness, name)
+                    batches.setdefault(name, []).append((guild_id, fire_time))
+                # Next occurrence counts from the scheduled time so drift never accumulates,
+                # but never schedules into the past after a long stall
+                self._push(name, guild_id, next_fire(guild_id, max(fire_time, now)), generation)
+
+            # Jobs keep their priority order; a job's shards run side by side
+            for name in sorted(batches, key=lambda name: self._jobs[name][2]):
+                await self.dispatch(name, batches[name])
+
+    async def dispatch(self, name, entries):
+        """Run a job for (guild_id, fire_time) entries, one concurrent, timed batch per partition."""
+        partitions = {}
+        for guild_id, fire_time in entries:
+            partitions.setdefault(self.partition(guild_id), []).append((guild_id, fire_time))
+        await asyncio.gather(*(
+            self._run_partition(name, partition, batch) for partition, batch in partitions.items()
+        ))
+
+    async def _run_partition(self, name, partition, entries):
+        handler = self._jobs[name][0]
+        started = time_module.perf_counter()
+        try:
+            await handler(entries)
+        except Exception as e:
+            jobs_log.error("Scheduled job %s failed on shard %s: %s", name, partition, e)
+        elapsed = time_module.perf_counter() - started
+        JOB_SECONDS.observe(elapsed, name, partition)
+
+        stats = self._stats.setdefault((name, partition), {"runs": 0, "guilds": 0, "last": 0.0, "max": 0.0, "total": 0.0})
+        stats["runs"] += 1
+        stats["guilds"] = len(entries)
+        stats["last"] = elapsed
+        stats["max"] = max(stats["max"], elapsed)
+        stats["total"] += elapsed
+        jobs_log.info(
+                "Scheduled job %s for %d guilds on shard %s finished in %.2fs", name, len(entries), partition, elapsed
+            )
+
+    def job_stats(self, partition):
+        """Return {job: counters} for one partition."""
+        return {name: dict(stats) for (name, part), stats in self._stats.items() if part == partition}
+
+    async def _wait(self, timeout):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+scheduler = JobScheduler(partition=shard_for_guild)
 
 @bot.event
 async def on_ready():
-    logging.info(f'Logged in as {bot.user.name}')
-    initialize_database()
-    if not post_daily_weather.is_running():
-        post_daily_weather.start()
-    if not auto_generate_weekly_forecast.is_running():
-        auto_generate_weekly_forecast.start()
-
-if TOKEN:
-    bot.run(TOKEN)
\ No newline at end of file
+    bot_log.info("Logged in as %s", bot.user.name)
+    await run_db(initialize_database)
+    # on_ready also fires after reconnects, so only set the schedule up once
+    if not scheduler.is_running():
+        guild_schedules.update(await run_db(load_guild_schedules))
+        # Weekly generation can share local midnight with the daily post and must run first
+        scheduler.add_job("weekly_generate", auto_generate_weekly_forecast, next_weekly_generation, priority=0)
+        scheduler.add_job("daily_post", post_daily_weather, next_daily_post, priority=1)
+        for guild in bot.guilds:
+            scheduler.add_guild(guild.id)
+        scheduler.start()
+        # Claims in the ledger keep this from racing the scheduler into double posts
+        asyncio.create_task(catch_up_missed_posts())
+        asyncio.create_task(retention_loop())
+        if METRICS_PORT:
+            try:
+                await start_metrics_server(METRICS_HOST, METRICS_PORT)
+            except OSError as e:
+                bot_log.error("Could not serve metrics on %s:%s: %s", METRICS_HOST, METRICS_PORT, e)
+
+@bot.event
+async def on_guild_join(guild):
+    scheduler.add_guild(guild.id)
+    await run_db(clear_guild_departed, guild.id)
+
+@bot.event
+async def on_guild_remove(guild):
+    scheduler.remove_guild(guild.id)
+    # Kept for a grace period in case the bot is re-invited, then purged by the retention job
+    await run_db(mark_guild_departed, guild.id)
+
+def run():
+    """Connect to Discord and serve until the bot shuts down."""
+    # Our queue handler already carries discord.py's logs; don't let it add a synchronous one
+    bot.run(TOKEN, log_handler=None)
+
+if __name__ == "__main__":
+    # Spawned generation workers re-run the main script, here all of this module; run_bot.py avoids that
+    bot_log.warning("Started from main.py; start the bot with src/run_bot.py so generation workers skip the bot's setup")
+    run()
\ No newline at end of file
@@ -0,0 +1,187 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+import aiohttp
+from aiohttp import web
+
+from logging_setup import get_logger
+
+# In-process counters and histograms, rendered in the Prometheus text format.
+# Updates take one uncontended lock and a bisect, so they are cheap enough to leave on;
+# the event loop and the database thread both record into the same metrics.
+
+# Seconds; spans a cached read up to a fleet-wide job
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+REGISTRY = []
+STARTED = time.time()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def values(self):
+        """Return a {label values: value} snapshot."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value}")
+        return lines
+
+class Counter(Metric):
+    """A monotonically increasing count per label set."""
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    """A value that is set, per label set."""
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(Metric):
+    """Bucketed observations per label set, with their count and sum."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (not cumulative) counts with a final +Inf slot, then count and sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def values(self):
+        with self._lock:
+            return {labels: (list(counts), count, total) for labels, (counts, count, total) in self._values.items()}
+
+    def quantile(self, q, counts):
+        """Estimate a quantile from per-bucket counts, interpolating inside the bucket like Prometheus."""
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def summary(self, q=0.95):
+        """Return {label values: (count, sum, estimated quantile q)}."""
+        return {labels: (count, total, self.quantile(q, counts)) for labels, (counts, count, total) in self.values().items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, (counts, count, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {count}")
+        return lines
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE|JOIN)\s+(\w+)", re.IGNORECASE)
+
+@lru_cache(maxsize=512)
+def statement_label(query):
+    """Reduce a SQL statement to a low-cardinality "VERB table" label, e.g. "SELECT weather_forecast"."""
+    words = query.split(None, 1)
+    if not words:
+        return "EMPTY"
+    table = STATEMENT_TABLE.search(query)
+    return f"{words[0].upper()} {table.group(1)}" if table else words[0].upper()
+
+class RateLimitCounter:
+    """Count Discord's 429 responses as the HTTP client receives them.
+
+    Counting from the responses rather than discord.py's warnings keeps the
+    metric independent of log levels. ``outcome`` follows how discord.py
+    handles the 429: "raised" when it gives up (no Via header, i.e. a
+    Cloudflare ban, or a wait beyond ``max_timeout``), "retried" otherwise.
+    Global limits are also counted in ``global_counter``.
+    """
+
+    def __init__(self, counter, global_counter, max_timeout=None):
+        self.counter = counter
+        self.global_counter = global_counter
+        self.max_timeout = max_timeout
+
+    def record(self, status, headers):
+        if status != 429:
+            return
+        retry_after = float(headers.get("Retry-After") or 0)
+        raised = not headers.get("Via") or bool(self.max_timeout and retry_after > self.max_timeout)
+        self.counter.inc("raised" if raised else "retried")
+        if headers.get("X-RateLimit-Global", "").lower() == "true":
+            self.global_counter.inc()
+
+    def trace_config(self):
+        """An aiohttp TraceConfig that records every response; pass it to the bot as ``http_trace``."""
+        async def on_request_end(session, context, params):
+            self.record(params.response.status, params.response.headers)
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+async def start_metrics_server(host, port):
+    """Serve GET /metrics on host:port; returns the aiohttp runner so it can be cleaned up."""
+    async def handle_metrics(request):
+        return web.Response(body=render_metrics().encode(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    get_logger("metrics").info("Serving metrics on http://%s:%s/metrics", host, port)
+    return runner
@@ -0,0 +1,11 @@
+# Entry point: python src/run_bot.py
+#
+# Generation workers are spawned processes, and a spawned process re-runs the
+# parent's main script before it starts on any task. Keeping that script down
+# to this guard means workers only import the modules their tasks use
+# (forecast_generation), not main.py with its logging, .env loading, metrics
+# and bot setup.
+
+if __name__ == "__main__":
+    import main
+    main.run()
@@ -1,5 +1,14 @@
 import random
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from string import Formatter
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the batch API
+    np = None
 
 # Weather Components
 PRECIPITATION_TYPES = {
@@ -219,6 +228,39 @@ TIME_OF_DAY = {
     }
 }
 
+# Sampler categories: options table, region modifier key, season/time modifier prefix
+SAMPLER_CATEGORIES = {
+    "precipitation": (PRECIPITATION_TYPES, "precipitation", "precipitation"),
+    "cloud_cover": (CLOUD_COVER, "cloud", "cloud"),
+    "wind": (WIND_SPEED, "wind_speed", "wind"),
+    "special": (SPECIAL_CONDITIONS, "special", "special"),
+    "magical": (MAGICAL_EFFECTS, "magical", "magical")
+}
+
+# Humidity levels in ascending order with their inclusive upper bounds
+HUMIDITY_KEYS = list(HUMIDITY_LEVELS)
+HUMIDITY_UPPER_BOUNDS = [HUMIDITY_LEVELS[k]["value"][1] for k in HUMIDITY_KEYS]
+
+class WeightedSampler:
+    """Precomputed cumulative weights for fast repeated weighted draws."""
+    __slots__ = ("keys", "cum_weights", "total", "_cum_array")
+
+    def __init__(self, weights):
+        self.keys = list(weights)
+        self.cum_weights = list(accumulate(weights.values()))
+        self.total = self.cum_weights[-1]
+        self._cum_array = None
+
+    def sample(self, rng=random):
+        """Draw one key using a single uniform draw and a bisect."""
+        return self.keys[bisect_right(self.cum_weights, rng.random() * self.total)]
+
+    def sample_indices(self, rng, n):
+        """Draw ``n`` key indices at once from a NumPy generator."""
+        if self._cum_array is None:
+            self._cum_array = np.asarray(self.cum_weights, dtype=float)
+        return np.searchsorted(self._cum_array, rng.random(n) * self.total, side="right")
+
 # Helper functions
 def weighted_choice(options_dict):
     """Select a random item based on weight."""
@@ -285,8 +327,141 @@ def apply_time_modifiers(base_weights, time_of_day, category):
     
     return modified_weights
 
-def get_temperature(season, region, time_of_day):
-    """Generate a temperature based on season, region, and time of day."""
+@lru_cache(maxsize=None)
+def get_sampler(season, region, time_of_day, category):
+    """Return the compiled sampler for a (season, region, time of day, category) key.
+
+    Modifiers are applied once when the key is first seen; later draws only
+    cost a bisect over the cached cumulative weights.
+    """
+    options, region_category, mod_category = SAMPLER_CATEGORIES[category]
+    weights = {k: v["weight"] for k, v in options.items()}
+    weights = apply_region_modifiers(weights, region, region_category)
+    weights = apply_season_modifiers(weights, season, mod_category)
+    weights = apply_time_modifiers(weights, time_of_day, mod_category)
+    return WeightedSampler(weights)
+
+def warm_samplers():
+    """Compile samplers for every known key so the first draws are not slowed down."""
+    for season in SEASONS_EXTENDED:
+        for region in REGION_MODIFIERS:
+            for time_of_day in TIME_OF_DAY:
+                for category in SAMPLER_CATEGORIES:
+                    get_sampler(season, region, time_of_day, category)
+
+# Weather continuity: per-(season, region) Markov chains over the persistent categories
+CONTINUITY_CATEGORIES = ("precipitation", "cloud_cover", "wind")
+CONTINUITY_PERSISTENCE = {"precipitation": 0.5, "cloud_cover": 0.55, "wind": 0.45}
+CONTINUITY_NEIGHBOUR_AFFINITY = (1.0, 0.5)  # Relative pull towards the same and adjacent states
+CONTINUITY_TIME_OF_DAY = "afternoon"  # Reference period for the chains' base weights
+
+def _mat_mul(a, b):
+    """Multiply two square matrices stored as lists of rows."""
+    columns = list(zip(*b))
+    return [[sum(x * y for x, y in zip(row, col)) for col in columns] for row in a]
+
+class MarkovChain:
+    """Transition matrix over one weather category's states, with cached row samplers."""
+
+    def __init__(self, states, matrix):
+        self.states = states
+        self.index = {state: i for i, state in enumerate(states)}
+        self.matrix = matrix
+        self.row_samplers = {
+            state: WeightedSampler(dict(zip(states, row))) for state, row in zip(states, matrix)
+        }
+        self._powers = {1: matrix}
+        self._stationary = None
+
+    def next_state(self, state, rng=random):
+        """Draw the state that follows ``state``."""
+        return self.row_samplers[state].sample(rng)
+
+    def power(self, k):
+        """Return the k-step transition matrix, built by repeated squaring and cached."""
+        if k < 1:
+            size = len(self.states)
+            return [[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)]
+        if k not in self._powers:
+            half = self.power(k // 2)
+            result = _mat_mul(half, half)
+            if k % 2:
+                result = _mat_mul(result, self.matrix)
+            self._powers[k] = result
+        return self._powers[k]
+
+    def step_distribution(self, state, k):
+        """Return the probability of each state k steps after ``state``."""
+        return dict(zip(self.states, self.power(k)[self.index[state]]))
+
+    def stationary(self, tolerance=1e-12, max_iterations=10000):
+        """Return the long-run state distribution of the chain."""
+        if self._stationary is None:
+            size = len(self.states)
+            dist = [1.0 / size] * size
+            for _ in range(max_iterations):
+                nxt = [sum(dist[i] * self.matrix[i][j] for i in range(size)) for j in range(size)]
+                converged = max(abs(a - b) for a, b in zip(dist, nxt)) < tolerance
+                dist = nxt
+                if converged:
+                    break
+            self._stationary = dict(zip(self.states, dist))
+        return self._stationary
+
+@lru_cache(maxsize=None)
+def get_markov_chain(season, region, category):
+    """Build the transition chain for a category from the compiled sampler weights.
+
+    Each row mixes the category's base distribution with a pull towards the
+    current and neighbouring states, so weather tends to persist or drift
+    gradually instead of jumping between extremes.
+    """
+    sampler = get_sampler(season, region, CONTINUITY_TIME_OF_DAY, category)
+    states = sampler.keys
+    base = [b - a for a, b in zip([0] + sampler.cum_weights[:-1], sampler.cum_weights)]
+    base = [w / sampler.total for w in base]
+    persistence = CONTINUITY_PERSISTENCE[category]
+    
+    matrix = []
+    for i in range(len(states)):
+        pull = [
+            base[j] * CONTINUITY_NEIGHBOUR_AFFINITY[abs(i - j)] if abs(i - j) < len(CONTINUITY_NEIGHBOUR_AFFINITY) else 0.0
+            for j in range(len(states))
+        ]
+        pull_total = sum(pull)
+        matrix.append([
+            persistence * p / pull_total + (1 - persistence) * b
+            for p, b in zip(pull, base)
+        ])
+    return MarkovChain(states, matrix)
+
+def draw_component(season, region, time_of_day, category, prev_conditions=None):
+    """Draw a category state, following the Markov chain when a previous state is known."""
+    if prev_conditions and category in CONTINUITY_PERSISTENCE:
+        chain = get_markov_chain(season, region, category)
+        previous = prev_conditions.get(category)
+        if previous in chain.index:
+            return chain.next_state(previous)
+    return get_sampler(season, region, time_of_day, category).sample()
+
+def get_weather_outlook(season, region, current_components, days=7):
+    """Return per-day state probabilities for the continuity categories.
+
+    Uses k-step transition matrices, so a multi-day outlook costs a handful of
+    cached matrix powers rather than a step-by-step simulation.
+    """
+    outlook = []
+    for k in range(1, days + 1):
+        day = {}
+        for category in CONTINUITY_CATEGORIES:
+            chain = get_markov_chain(season, region, category)
+            state = current_components.get(category)
+            day[category] = chain.step_distribution(state, k) if state in chain.index else chain.stationary()
+        outlook.append(day)
+    return outlook
+
+def get_temperature_range(season, region, time_of_day):
+    """Return the inclusive temperature range for season, region, and time of day."""
     # Base temperature from season
     base_min, base_max = SEASONS_EXTENDED[season]["temp_range"]
     
@@ -300,42 +475,35 @@ def get_temperature(season, region, time_of_day):
     adjusted_min += time_mod
     adjusted_max += time_mod
     
+    return adjusted_min, adjusted_max
+
+def get_temperature(season, region, time_of_day):
+    """Generate a temperature based on season, region, and time of day."""
     # Random temperature within range
-    return random.randint(adjusted_min, adjusted_max)
+    return random.randint(*get_temperature_range(season, region, time_of_day))
 
 def get_weather_components(season, region, time_of_day, prev_conditions=None):
     """Generate all weather components based on parameters."""
     
-    # Apply continuity if we have previous conditions
-    if prev_conditions:
-        # Implement weather pattern continuity logic here
-        pass
+    # Precipitation, cloud cover and wind follow the continuity chains
+    # when we have previous conditions
     
     # Get precipitation
-    precip_weights = {k: v["weight"] for k, v in PRECIPITATION_TYPES.items()}
-    precip_weights = apply_region_modifiers(precip_weights, region, "precipitation")
-    precip_weights = apply_season_modifiers(precip_weights, season, "precipitation")
-    precipitation = weighted_choice(PRECIPITATION_TYPES)
+    precipitation = draw_component(season, region, time_of_day, "precipitation", prev_conditions)
     
     # Get cloud cover
-    cloud_weights = {k: v["weight"] for k, v in CLOUD_COVER.items()}
-    cloud_weights = apply_region_modifiers(cloud_weights, region, "cloud")
-    cloud_weights = apply_season_modifiers(cloud_weights, season, "cloud")
-    cloud_cover = weighted_choice(CLOUD_COVER)
+    cloud_cover = draw_component(season, region, time_of_day, "cloud_cover", prev_conditions)
     
     # If we have precipitation, adjust cloud cover accordingly
     if precipitation != "none":
         cloud_cover = random.choice(["mostly_cloudy", "overcast"])
     
     # Get wind speed
-    wind_weights = {k: v["weight"] for k, v in WIND_SPEED.items()}
-    wind_weights = apply_region_modifiers(wind_weights, region, "wind_speed")
-    wind_weights = apply_season_modifiers(wind_weights, season, "wind")
-    wind = weighted_choice(WIND_SPEED)
+    wind = draw_component(season, region, time_of_day, "wind", prev_conditions)
     wind_speed = random.randint(WIND_SPEED[wind]["speed"][0], WIND_SPEED[wind]["speed"][1])
     
     # Get humidity
-    base_humidity = random.choice(list(HUMIDITY_LEVELS.keys()))
+    base_humidity = random.choice(HUMIDITY_KEYS)
     humidity_value = random.randint(
         HUMIDITY_LEVELS[base_humidity]["value"][0], 
         HUMIDITY_LEVELS[base_humidity]["value"][1]
@@ -346,26 +514,13 @@ def get_weather_components(season, region, time_of_day, prev_conditions=None):
     humidity_value = max(0, min(100, humidity_value + humidity_mod))
     
     # Recalculate humidity level based on the adjusted value
-    for level, data in HUMIDITY_LEVELS.items():
-        if data["value"][0] <= humidity_value <= data["value"][1]:
-            humidity = level
-            break
-    else:
-        humidity = "comfortable"  # fallback
+    humidity = HUMIDITY_KEYS[bisect_left(HUMIDITY_UPPER_BOUNDS, humidity_value)]
     
     # Get special conditions
-    special_weights = {k: v["weight"] for k, v in SPECIAL_CONDITIONS.items()}
-    special_weights = apply_region_modifiers(special_weights, region, "special")
-    special_weights = apply_season_modifiers(special_weights, season, "special")
-    special_weights = apply_time_modifiers(special_weights, time_of_day, "special")
-    special = weighted_choice(SPECIAL_CONDITIONS)
+    special = get_sampler(season, region, time_of_day, "special").sample()
     
     # Get magical effects
-    magical_weights = {k: v["weight"] for k, v in MAGICAL_EFFECTS.items()}
-    magical_weights = apply_region_modifiers(magical_weights, region, "magical")
-    magical_weights = apply_season_modifiers(magical_weights, season, "magical")
-    magical_weights = apply_time_modifiers(magical_weights, time_of_day, "magical")
-    magical = weighted_choice(MAGICAL_EFFECTS)
+    magical = get_sampler(season, region, time_of_day, "magical").sample()
     
     # Get temperature
     temperature = get_temperature(season, region, time_of_day)
@@ -383,116 +538,234 @@ def get_weather_components(season, region, time_of_day, prev_conditions=None):
         "temperature": temperature
     }
 
-def generate_weather_description(components, season, region, time_of_day, style="standard"):
-    """Generate a descriptive weather text from components."""
+@lru_cache(maxsize=None)
+def _batch_tables():
+    """Build the NumPy lookup arrays used by the batch API."""
+    return {
+        "wind_low": np.array([v["speed"][0] for v in WIND_SPEED.values()]),
+        "wind_high": np.array([v["speed"][1] for v in WIND_SPEED.values()]),
+        "humidity_keys": np.array(HUMIDITY_KEYS),
+        "humidity_low": np.array([v["value"][0] for v in HUMIDITY_LEVELS.values()]),
+        "humidity_high": np.array([v["value"][1] for v in HUMIDITY_LEVELS.values()]),
+        "humidity_upper": np.array(HUMIDITY_UPPER_BOUNDS),
+        "wet_clouds": np.array(["mostly_cloudy", "overcast"])
+    }
+
+def get_weather_components_batch(season, region, time_of_day, n, rng=None):
+    """Generate ``n`` independent weather component records in one vectorized pass.
+
+    Returns a dict of NumPy column arrays with the same keys as
+    get_weather_components. ``rng`` may be a numpy Generator, a seed or None.
+    """
+    if np is None:
+        raise ImportError("get_weather_components_batch requires numpy")
+    rng = np.random.default_rng(rng)
+    tables = _batch_tables()
+    
+    def draw(category):
+        sampler = get_sampler(season, region, time_of_day, category)
+        return np.array(sampler.keys)[sampler.sample_indices(rng, n)]
+    
+    # Precipitation and cloud cover, forcing heavy cloud when it is wet
+    precipitation = draw("precipitation")
+    cloud_cover = draw("cloud_cover")
+    cloud_cover = np.where(precipitation != "none", rng.choice(tables["wet_clouds"], n), cloud_cover)
+    
+    # Wind category and a speed inside its range
+    wind_sampler = get_sampler(season, region, time_of_day, "wind")
+    wind_idx = wind_sampler.sample_indices(rng, n)
+    wind = np.array(wind_sampler.keys)[wind_idx]
+    wind_speed = rng.integers(tables["wind_low"][wind_idx], tables["wind_high"][wind_idx], endpoint=True)
+    
+    # Humidity: uniform base level, regional shift, then re-bucket
+    base_idx = rng.integers(0, len(HUMIDITY_KEYS), n)
+    humidity_value = rng.integers(tables["humidity_low"][base_idx], tables["humidity_high"][base_idx], endpoint=True)
+    humidity_mod = REGION_MODIFIERS[region].get("humidity_mod", 0)
+    humidity_value = np.clip(humidity_value + humidity_mod, 0, 100)
+    humidity = tables["humidity_keys"][np.searchsorted(tables["humidity_upper"], humidity_value, side="left")]
     
-    # Extract components
-    precipitation = components["precipitation"]
-    cloud_cover = components["cloud_cover"]
-    wind = components["wind"]
-    wind_speed = components["wind_speed"]
-    special = components["special"]
-    magical = components["magical"]
-    temperature = components["temperature"]
-    
-    # Get descriptions
-    precip_desc = get_random_description(PRECIPITATION_TYPES, precipitation)
-    cloud_desc = get_random_description(CLOUD_COVER, cloud_cover)
-    wind_desc = get_random_description(WIND_SPEED, wind)
-    special_desc = get_random_description(SPECIAL_CONDITIONS, special)
-    magical_desc = get_random_description(MAGICAL_EFFECTS, magical)
-    
-    # Region prefix
-    region_prefix = random.choice(REGION_MODIFIERS[region]["description_prefix"])
-    
-    # Season prefix
-    season_prefix = random.choice(SEASONS_EXTENDED[season]["description_prefix"])
-    
-    # Time prefix
-    time_prefix = random.choice(TIME_OF_DAY[time_of_day]["description_prefix"])
-    
-    # Flora description for the season
-    flora_desc = random.choice(SEASONS_EXTENDED[season]["flora_descriptions"])
-    
-    # Color descriptor for time of day
-    color_desc = random.choice(TIME_OF_DAY[time_of_day]["color_descriptors"])
-    
-    # Construct description based on style
-    if style == "brief":
-        # Brief style: just temperature and main conditions
-        main_condition = precip_desc if precipitation != "none" else cloud_desc
-        return f"{main_condition} and {temperature}°F"
-        
-    elif style == "standard":
-        # Standard style: main weather components
-        parts = []
-        
-        # Temperature description
-        if temperature < 32:
-            temp_desc = "freezing"
-        elif temperature < 50:
-            temp_desc = "cold"
-        elif temperature < 65:
-            temp_desc = "cool"
-        elif temperature < 75:
-            temp_desc = "mild"
-        elif temperature < 85:
-            temp_desc = "warm"
-        elif temperature < 95:
-            temp_desc = "hot"
-        else:
-            temp_desc = "scorching"
-        
-        # Main weather condition
-        if precipitation != "none":
-            parts.append(f"{precip_desc}")
-        else:
-            parts.append(f"{cloud_desc}")
-        
-        # Add wind if significant
-        if wind != "calm":
-            parts.append(f"with {wind_desc}")
-        
-        # Add special condition if present
-        if special != "none":
-            parts.append(f"and {special_desc}")
-        
-        # Add temperature
-        description = f"{', '.join(parts)}. {temp_desc} at {temperature}°F"
-        return description
-        
-    elif style == "immersive":
-        # Immersive style: rich, detailed description
-        description = f"The {time_prefix} sky over the {region_prefix} lands is {color_desc}"
-        
-        # Cloud and precipitation
-        if precipitation != "none":
-            description += f", with {precip_desc} falling from {cloud_desc}"
-        else:
-            description += f" with {cloud_desc}"
-        
-        # Wind description
-        if wind != "calm":
-            description += f". {wind_desc.capitalize()} stirs the {flora_desc}"
-        else:
-            description += f". The air is {wind_desc}, barely disturbing the {flora_desc}"
-        
-        # Special effects
-        if special != "none":
-            description += f". {special_desc.capitalize()} adds to the {season_prefix} atmosphere"
-        
-        # Magical effects
-        if magical != "none":
-            description += f", while {magical_desc} can be sensed by the magically attuned"
-        
-        # Temperature
-        description += f". The temperature stands at {temperature}°F"
-        
-        return description
+    special = draw("special")
+    magical = draw("magical")
+    
+    temp_min, temp_max = get_temperature_range(season, region, time_of_day)
+    temperature = rng.integers(temp_min, temp_max, size=n, endpoint=True)
     
-    else:
-        # Default fallback
-        return f"{cloud_desc} with {precip_desc}, {wind_desc}. Currently {temperature}°F"
+    return {
+        "precipitation": precipitation,
+        "cloud_cover": cloud_cover,
+        "wind": wind,
+        "wind_speed": wind_speed,
+        "humidity": humidity,
+        "humidity_value": humidity_value,
+        "special": special,
+        "magical": magical,
+        "temperature": temperature
+    }
+
+# Description templates: each style is compiled at import time into one format string per
+# combination of its optional parts, drawing from precomputed fragment tables
+TEMPERATURE_BOUNDS = (32, 50, 65, 75, 85, 95)
+TEMPERATURE_WORDS = ("freezing", "cold", "cool", "mild", "warm", "hot", "scorching")
+
+def temperature_word(temperature):
+    """Describe a temperature in one word, e.g. 58 -> "cool"."""
+    return TEMPERATURE_WORDS[bisect_right(TEMPERATURE_BOUNDS, temperature)]
+
+def _fragment_table(options, capitalize=False):
+    """Map each option key to a tuple of its descriptions; "none" always renders as ""."""
+    table = {}
+    for key, attrs in options.items():
+        descriptions = ("",) if key == "none" else tuple(attrs["description"])
+        table[key] = tuple(d.capitalize() for d in descriptions) if capitalize else descriptions
+    return table
+
+# Template fields drawn from a component's descriptions: field -> (component, fragment table)
+COMPONENT_FRAGMENTS = {
+    "precipitation": ("precipitation", _fragment_table(PRECIPITATION_TYPES)),
+    "cloud_cover": ("cloud_cover", _fragment_table(CLOUD_COVER)),
+    "wind": ("wind", _fragment_table(WIND_SPEED)),
+    "wind_capitalized": ("wind", _fragment_table(WIND_SPEED, capitalize=True)),
+    "special": ("special", _fragment_table(SPECIAL_CONDITIONS)),
+    "special_capitalized": ("special", _fragment_table(SPECIAL_CONDITIONS, capitalize=True)),
+    "magical": ("magical", _fragment_table(MAGICAL_EFFECTS)),
+}
+
+# Template fields drawn from the rendering context: field -> (context argument, {context key: fragments})
+CONTEXT_FRAGMENTS = {
+    "season_prefix": ("season", {k: tuple(v["description_prefix"]) for k, v in SEASONS_EXTENDED.items()}),
+    "flora": ("season", {k: tuple(v["flora_descriptions"]) for k, v in SEASONS_EXTENDED.items()}),
+    "region_prefix": ("region", {k: tuple(v["description_prefix"]) for k, v in REGION_MODIFIERS.items()}),
+    "time_prefix": ("time_of_day", {k: tuple(v["description_prefix"]) for k, v in TIME_OF_DAY.items()}),
+    "color": ("time_of_day", {k: tuple(v["color_descriptors"]) for k, v in TIME_OF_DAY.items()}),
+}
+
+# Flags that switch optional template segments on: flag -> (component, value that turns it off).
+# "!flag" segments render when the flag is off.
+TEMPLATE_FLAGS = {
+    "wet": ("precipitation", "none"),
+    "windy": ("wind", "calm"),
+    "special": ("special", "none"),
+    "magical": ("magical", "none"),
+}
+
+# Each style is a list of (flag or None, text) segments rendered in order
+STYLE_TEMPLATES = {
+    "brief": [
+        ("wet", "{precipitation}"),
+        ("!wet", "{cloud_cover}"),
+        (None, " and {temperature}°F"),
+    ],
+    "standard": [
+        ("wet", "{precipitation}"),
+        ("!wet", "{cloud_cover}"),
+        ("windy", ", with {wind}"),
+        ("special", ", and {special}"),
+        (None, ". {temperature_word} at {temperature}°F"),
+    ],
+    "immersive": [
+        (None, "The {time_prefix} sky over the {region_prefix} lands is {color}"),
+        ("wet", ", with {precipitation} falling from {cloud_cover}"),
+        ("!wet", " with {cloud_cover}"),
+        ("windy", ". {wind_capitalized} stirs the {flora}"),
+        ("!windy", ". The air is {wind}, barely disturbing the {flora}"),
+        ("special", ". {special_capitalized} adds to the {season_prefix} atmosphere"),
+        ("magical", ", while {magical} can be sensed by the magically attuned"),
+        (None, ". The temperature stands at {temperature}°F"),
+    ],
+    # Used for any unknown style
+    "fallback": [
+        (None, "{cloud_cover} with {precipitation}, {wind}. Currently {temperature}°F"),
+    ],
+}
+
+# How a compiled field gets its value
+FIELD_FRAGMENT, FIELD_CONTEXT, FIELD_VALUE, FIELD_TEMPERATURE_WORD = range(4)
+
+class DescriptionTemplate:
+    """A style compiled into a %-format string and field plan per flag combination."""
+    __slots__ = ("flags", "variants")
+
+    def __init__(self, segments):
+        self.flags = tuple(dict.fromkeys(flag.lstrip("!") for flag, _ in segments if flag))
+        self.variants = [self._compile(segments, mask) for mask in range(1 << len(self.flags))]
+
+    def _compile(self, segments, mask):
+        parts, fields = [], []
+        for flag, text in segments:
+            if flag and bool(mask & (1 << self.flags.index(flag.lstrip("!")))) == flag.startswith("!"):
+                continue
+            for literal, field, _, _ in Formatter().parse(text):
+                parts.append(literal.replace("%", "%%"))
+                if field is not None:
+                    parts.append("%s")
+                    fields.append(self._field_plan(field))
+        return "".join(parts), tuple(fields)
+
+    @staticmethod
+    def _field_plan(field):
+        if field in COMPONENT_FRAGMENTS:
+            return (FIELD_FRAGMENT,) + COMPONENT_FRAGMENTS[field]
+        if field in CONTEXT_FRAGMENTS:
+            return (FIELD_CONTEXT,) + CONTEXT_FRAGMENTS[field]
+        if field == "temperature":
+            return FIELD_VALUE, "temperature", None
+        if field == "temperature_word":
+            return FIELD_TEMPERATURE_WORD, "temperature", None
+        raise ValueError(f"Unknown description template field: {field}")
+
+    def bind(self, season, region, time_of_day):
+        """Resolve context fields to their fragment tuples, returning (flag tests, variants)."""
+        context = {"season": season, "region": region, "time_of_day": time_of_day}
+        tests = tuple((1 << bit,) + TEMPLATE_FLAGS[flag] for bit, flag in enumerate(self.flags))
+        variants = [
+            (fmt, tuple(
+                (FIELD_FRAGMENT, None, table[context[key]]) if kind == FIELD_CONTEXT else (kind, key, table)
+                for kind, key, table in fields
+            ))
+            for fmt, fields in self.variants
+        ]
+        return tests, variants
+
+DESCRIPTION_TEMPLATES = {style: DescriptionTemplate(segments) for style, segments in STYLE_TEMPLATES.items()}
+
+@lru_cache(maxsize=None)
+def get_description_plan(style, season, region, time_of_day):
+    """Return the bound (flag tests, variants) plan for a style and rendering context."""
+    template = DESCRIPTION_TEMPLATES.get(style, DESCRIPTION_TEMPLATES["fallback"])
+    return template.bind(season, region, time_of_day)
+
+def render_weather_descriptions(records, season, region, time_of_day, style="standard", rng=random):
+    """Render a description for each component record in one pass.
+
+    ``records`` is a list of get_weather_components dicts, or the column dict
+    returned by get_weather_components_batch.
+    """
+    if isinstance(records, dict):
+        records = [dict(zip(records, values)) for values in zip(*records.values())]
+    tests, variants = get_description_plan(style, season, region, time_of_day)
+    draw = rng.random
+    descriptions = []
+    for components in records:
+        mask = 0
+        for bit, component, off in tests:
+            if components[component] != off:
+                mask |= bit
+        fmt, fields = variants[mask]
+        values = []
+        for kind, key, table in fields:
+            if kind == FIELD_FRAGMENT:
+                options = table if key is None else table[components[key]]
+                values.append(options[int(draw() * len(options))])
+            elif kind == FIELD_VALUE:
+                values.append(components[key])
+            else:
+                values.append(TEMPERATURE_WORDS[bisect_right(TEMPERATURE_BOUNDS, components[key])])
+        descriptions.append(fmt % tuple(values))
+    return descriptions
+
+def generate_weather_description(components, season, region, time_of_day, style="standard"):
+    """Generate a descriptive weather text from components."""
+    return render_weather_descriptions((components,), season, region, time_of_day, style)[0]
 
 def get_weather_forecast(server_id, dates=None, season=None, region=None, style="standard"):
     """Generate a weather forecast for specified dates."""